@@ -3,6 +3,9 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn backend.asgi:application``) so the
+async chat endpoint can keep many Dialogflow/OpenAI calls in flight per process.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -179,6 +179,8 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  
 ]
 CORS_ALLOW_CREDENTIALS = True  
+# Let the frontend read pagination and caching headers
+CORS_EXPOSE_HEADERS = ["Link", "X-Next-Cursor", "ETag"]
 
 CSRF_COOKIE_NAME = "csrftoken"
 CSRF_TRUSTED_ORIGINS = [
@@ -202,7 +204,58 @@ GOOGLE_APPLICATION_CREDENTIALS = os.path.join(BASE_DIR, "config/dialogflow-key.j
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = GOOGLE_APPLICATION_CREDENTIALS
 
 DIALOGFLOW_PROJECT_ID = "flourish-448006"
-OPENAI_API_KEY = env("OPENAI_API_KEY")
+DIALOGFLOW_CLIENT_POOL_SIZE = 4  # Shared SessionsClient channels per process
+
+# Chatbot reply cache. BACKEND "local" keeps an in-process LRU of MAX_ENTRIES;
+# "django" stores replies in the CACHES alias CACHE_ALIAS (e.g. file or DB cache).
+CHAT_RESPONSE_CACHE = {
+    "BACKEND": "local",
+    "TTL": 60 * 60,
+    "MAX_ENTRIES": 1024,
+    "CACHE_ALIAS": "default",
+}
+LOCAL_INTENT_MIN_CONFIDENCE = 0.9  # Below this, messages go to Dialogflow
+
+# Chat provider deadlines (seconds) and circuit breakers
+CHAT_REQUEST_DEADLINE = 15
+DIALOGFLOW_TIMEOUT = 5
+OPENAI_TIMEOUT = 12
+CHAT_CIRCUIT_BREAKER = {
+    "FAILURE_THRESHOLD": 5,  # Consecutive failures before a breaker opens
+    "RESET_TIMEOUT": 30,  # Seconds before a probe call is let through
+}
+
+# Chat messages are inserted in batches by a background thread instead of on
+# the request path. Unflushed messages are spilled to SPILL_DIR at shutdown.
+CHAT_WRITE_BUFFER = {
+    "ENABLED": True,
+    "MAX_BATCH": 100,
+    "FLUSH_INTERVAL": 0.5,  # seconds
+    "SPILL_DIR": os.path.join(BASE_DIR, "chat_spill"),
+}
+
+# Upcoming cycles written per user by `manage.py forecast_cycles`
+CYCLE_FORECAST_HORIZON = 6
+
+# Symptom analytics endpoint: matrix size and cache lifetimes (seconds)
+SYMPTOM_ANALYTICS = {
+    "TOP_SYMPTOMS": 25,
+    "MAX_CYCLE_DAY": 45,
+    "USER_TTL": 24 * 60 * 60,
+    "POPULATION_TTL": 60 * 60,
+}
+
+# Symptom trends endpoint: most points per response, and series shown by default
+SYMPTOM_TRENDS = {
+    "MAX_POINTS": 104,
+    "TOP_SYMPTOMS": 10,
+}
+
+# Ranked article searches (PostgreSQL full-text search) return at most this many results
+ARTICLE_SEARCH_MAX_RESULTS = 100
+
+# Optional: without it the chatbot answers from Dialogflow only.
+OPENAI_API_KEY = env("OPENAI_API_KEY", default="")
 
 LOGGING = {
     'version': 1,
@@ -0,0 +1,60 @@
+"""
+Lazily loaded credentials and SDK clients for the chatbot's AI providers.
+
+google.cloud.dialogflow_v2, google.oauth2 and openai are slow to import, and the
+service-account key may be missing in development, so nothing here is touched
+until the first chat message needs it. manage.py commands, tests and worker
+boot never pay for them.
+"""
+import asyncio
+import threading
+import weakref
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_credentials = None
+_openai_client = None
+# httpx clients are bound to their event loop, so keep one AsyncOpenAI per loop.
+_async_openai_clients = weakref.WeakKeyDictionary()
+
+
+def dialogflow_v2():
+    """Returns the google.cloud.dialogflow_v2 module, importing it on first use."""
+    from google.cloud import dialogflow_v2
+    return dialogflow_v2
+
+
+def get_credentials():
+    """Loads the Dialogflow service-account credentials once, on first use."""
+    global _credentials
+    if _credentials is None:
+        with _lock:
+            if _credentials is None:
+                from google.oauth2 import service_account
+                _credentials = service_account.Credentials.from_service_account_file(
+                    settings.GOOGLE_APPLICATION_CREDENTIALS
+                )
+    return _credentials
+
+
+def get_openai_client():
+    """Returns the process-wide OpenAI client. Retries are off: chat deadlines bound each call."""
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                import openai
+                _openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+    return _openai_client
+
+
+def get_async_openai_client():
+    """Returns the AsyncOpenAI client shared by the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_openai_clients.get(loop)
+    if client is None:
+        import openai
+        client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        _async_openai_clients[loop] = client
+    return client
@@ -0,0 +1,90 @@
+"""
+Article search for ArticleListView.
+
+On PostgreSQL articles carry a stored, weighted tsvector (title > keywords >
+content) that a trigger keeps current and a GIN index serves, so a search is an
+index lookup instead of an ILIKE scan over every article's text. Results are
+ordered by SearchRank and come with a highlighted snippet of the content. The
+last word of the search is matched as a prefix, so results show up while a word
+is still being typed. The snippet's content is HTML-escaped before the <mark>
+tags are added, so it can be rendered as HTML.
+
+Other databases (SQLite in development) fall back to icontains on title and
+content, with title matches first.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Replace
+
+SEARCH_CONFIG = "english"  # Must match the config the 0020 trigger builds the vector with
+MAX_SEARCH_RESULTS = getattr(settings, "ARTICLE_SEARCH_MAX_RESULTS", 100)
+
+_LAST_WORD = re.compile(r"(?:^|\s)(\w+)\s*$")
+_TRAILING_OR = re.compile(r"(?:^|\s)or$", re.IGNORECASE)
+# What django.utils.html.escape replaces; & goes first so no entity is escaped twice
+_HTML_ESCAPES = [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")]
+
+
+def _search_query(text):
+    """
+    websearch syntax (quoted phrases, "or", -excluded words), with a trailing
+    plain word matched as a prefix. Phrases and exclusions stay exact.
+    """
+    text = text.strip()
+    match = _LAST_WORD.search(text)
+    if match is None or text.count('"') % 2 or match.group(1).lower() == "or":
+        return SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+
+    # \w+ only, so the word cannot inject tsquery operators into the raw query
+    prefix = SearchQuery(f"{match.group(1)}:*", config=SEARCH_CONFIG, search_type="raw")
+    rest = text[:match.start()].strip()
+    if not rest:
+        return prefix
+    if _TRAILING_OR.search(rest):
+        return SearchQuery(rest[:-2], config=SEARCH_CONFIG, search_type="websearch") | prefix
+    return SearchQuery(rest, config=SEARCH_CONFIG, search_type="websearch") & prefix
+
+
+def _escaped(field):
+    expression = F(field)
+    for character, entity in _HTML_ESCAPES:
+        expression = Replace(expression, Value(character), Value(entity))
+    return expression
+
+
+def _postgres_search(queryset, text):
+    query = _search_query(text)
+    matches = (
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by("-rank", "-published_date")[:MAX_SEARCH_RESULTS]
+    )
+    # Headlines are costly, so they are built only for the returned page of results
+    return queryset.model.objects.filter(pk__in=matches.values("pk")).annotate(
+        rank=SearchRank(F("search_vector"), query),
+        headline=SearchHeadline(
+            _escaped("content"), query, config=SEARCH_CONFIG,
+            start_sel="<mark>", stop_sel="</mark>", max_words=35, min_words=15, max_fragments=2,
+        ),
+    ).order_by("-rank", "-published_date")
+
+
+def _fallback_search(queryset, text):
+    return (
+        queryset.filter(Q(title__icontains=text) | Q(content__icontains=text))
+        .annotate(title_match=Case(
+            When(title__icontains=text, then=Value(1)), default=Value(0), output_field=IntegerField()
+        ))
+        .order_by("-title_match", "-published_date")
+    )
+
+
+def search_articles(queryset, text):
+    """Narrows an Article queryset to those matching `text`, best matches first."""
+    if connection.vendor == "postgresql":
+        return _postgres_search(queryset, text)
+    return _fallback_search(queryset, text)
@@ -0,0 +1,362 @@
+"""
+Write-behind buffer for chat Message rows.
+
+Chat requests enqueue their messages here instead of inserting them on the
+request path. A background thread writes them with bulk_create once MAX_BATCH
+messages are waiting or FLUSH_INTERVAL seconds have passed. Messages that cannot
+be written at shutdown are spilled to SPILL_DIR as JSON lines and replayed by the
+next process that starts the buffer.
+
+Each message keeps the timestamp and the client_id (a UUID) it was given when
+queued, so the written row is indistinguishable from the pending entry that
+get_chat_history already returned. Reads in the same process see buffered
+messages through pending_for(), which get_chat_history merges into its response.
+That read-your-writes guarantee holds only within one process: another worker
+cannot see this process's buffer, and messages reach it once they are flushed,
+at most FLUSH_INTERVAL seconds later.
+
+Messages of a chat deleted while they were buffered (possibly by another
+process) are dropped, as discard_chat() drops them in the deleting process, and
+the stale chat id is forgotten so the next message resolves its session afresh.
+
+A batch the database rejects (e.g. text PostgreSQL cannot store) is retried one
+row at a time, and rows that still fail are moved to a dead-letter file in
+SPILL_DIR, so one bad message never holds up the rest. Only while the database
+is unreachable are messages kept and retried.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ChatSession, Message
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the database could not be reached, rather than that it rejected a message
+DATABASE_UNAVAILABLE = (OperationalError, InterfaceError)
+
+
+class DatabaseUnavailable(Exception):
+    """Raised by MessageBuffer._write with the messages it could not write yet."""
+
+    def __init__(self, unwritten):
+        super().__init__(f"{len(unwritten)} chat messages not written")
+        self.unwritten = unwritten
+
+
+class MessageBuffer:
+    def __init__(self, max_batch=100, flush_interval=0.5, spill_dir=None):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Replays spilled messages and starts the flusher thread."""
+        self.recover()
+        self._thread = threading.Thread(target=self._run, name="chat-message-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def add(self, chat_id, sender, text, user_id=None, session_id=None):
+        message = {
+            "chat_id": chat_id,
+            "sender": sender,
+            "text": text,
+            "timestamp": timezone.now(),
+            "client_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "session_id": session_id,
+        }
+        with self._lock:
+            self._pending.append(message)
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wakeup.set()
+        return message
+
+    def pending_for(self, chat_ids):
+        """Buffered messages for the given chats, oldest first, keyed by chat id."""
+        chat_ids = set(chat_ids)
+        pending = {}
+        with self._lock:
+            for message in self._pending:
+                if message["chat_id"] in chat_ids:
+                    pending.setdefault(message["chat_id"], []).append(message)
+        return pending
+
+    def discard_chat(self, chat_id):
+        """Drops buffered messages of a deleted chat."""
+        with self._lock:
+            self._pending = [message for message in self._pending if message["chat_id"] != chat_id]
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing chat messages, will retry: {str(e)}")
+                time.sleep(self.flush_interval)
+
+    def flush(self):
+        """
+        Writes every buffered message. If the database is unreachable the unwritten
+        ones are put back for the next attempt; messages it rejects are dead-lettered.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            close_old_connections()
+            try:
+                self._write(batch)
+            except DatabaseUnavailable as e:
+                with self._lock:
+                    self._pending = e.unwritten + self._pending
+                raise
+            return len(batch)
+
+    def _write(self, batch):
+        """Inserts the batch, one row at a time if the database rejects it as a whole."""
+        try:
+            self._insert(batch)
+            return
+        except DATABASE_UNAVAILABLE as e:
+            raise DatabaseUnavailable(batch) from e
+        except Exception as e:
+            logger.warning(f"Could not insert {len(batch)} chat messages at once ({str(e)}), retrying one by one")
+        for i, message in enumerate(batch):
+            try:
+                self._insert([message])
+            except DATABASE_UNAVAILABLE as e:
+                raise DatabaseUnavailable(batch[i:]) from e
+            except Exception as e:
+                self.dead_letter(message, e)
+
+    def _insert(self, batch):
+        try:
+            with transaction.atomic():
+                Message.objects.bulk_create([_to_row(message) for message in batch], batch_size=self.max_batch)
+        except IntegrityError:
+            # A chat was deleted while its messages were buffered
+            batch = _drop_orphans(batch)
+            with transaction.atomic():
+                Message.objects.bulk_create([_to_row(message) for message in batch], batch_size=self.max_batch)
+
+    def dead_letter(self, message, error):
+        """Sets aside a message the database rejected, in SPILL_DIR when one is configured."""
+        if self.spill_dir is None:
+            logger.error(f"Dropping chat message {message.get('client_id')} for chat {message['chat_id']}: {str(error)}")
+            return
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f"dead-letter-{os.getpid()}.jsonl"  # Not replayed by recover()
+        with open(path, "a") as dead_letter_file:
+            dead_letter_file.write(json.dumps({**_serialize(message), "error": str(error)}) + "\n")
+        logger.error(f"Moved chat message {message.get('client_id')} to {path}: {str(error)}")
+
+    def shutdown(self):
+        """Final flush at interpreter exit; spills to disk if the database is unavailable."""
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Could not flush chat messages at shutdown: {str(e)}")
+            self.spill()
+
+    def spill(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch or self.spill_dir is None:
+            if batch:
+                logger.error(f"Lost {len(batch)} chat messages: no CHAT_WRITE_BUFFER SPILL_DIR configured")
+            return
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f"messages-{os.getpid()}-{int(time.time() * 1000)}.jsonl"
+        _write_spill_file(path, batch)
+        logger.warning(f"Spilled {len(batch)} chat messages to {path}")
+
+    def recover(self):
+        """Replays spill files left by processes that could not flush at shutdown."""
+        if self.spill_dir is None or not self.spill_dir.exists():
+            return
+        for path in sorted(self.spill_dir.glob("messages-*.jsonl")):
+            claimed = path.with_suffix(".replaying")
+            try:
+                path.rename(claimed)  # Atomic, so only one process replays each file
+            except OSError:
+                continue
+            with open(claimed) as spill_file:
+                batch = [json.loads(line) for line in spill_file if line.strip()]
+            for message in batch:
+                message["timestamp"] = parse_datetime(message["timestamp"])
+            try:
+                self._write(batch)
+            except DatabaseUnavailable as e:
+                logger.error(f"Could not replay {claimed}, leaving the rest for the next start: {str(e.__cause__)}")
+                _write_spill_file(path, e.unwritten)  # Only what is still unwritten, so nothing is inserted twice
+                claimed.unlink()
+                continue
+            claimed.unlink()
+            logger.info(f"Replayed {len(batch)} spilled chat messages from {path.name}")
+
+
+def _serialize(message):
+    return {**message, "timestamp": message["timestamp"].isoformat()}
+
+
+def _write_spill_file(path, batch):
+    with open(path, "w") as spill_file:
+        for message in batch:
+            spill_file.write(json.dumps(_serialize(message)) + "\n")
+
+
+def _to_row(message):
+    return Message(
+        chat_id=message["chat_id"],
+        sender=message["sender"],
+        text=message["text"],
+        timestamp=message["timestamp"],
+        client_id=message.get("client_id"),  # Absent from spill files written before client ids
+    )
+
+
+def _drop_orphans(batch):
+    """
+    Drops messages whose chat has been deleted; the user deleted it, so it is not
+    recreated. Its cached chat id is forgotten, so a later message to the same
+    session id starts a new chat.
+    """
+    existing = set(
+        ChatSession.objects.filter(id__in={message["chat_id"] for message in batch}).values_list("id", flat=True)
+    )
+    kept = []
+    for message in batch:
+        if message["chat_id"] in existing:
+            kept.append(message)
+            continue
+        forget_chat_key(message.get("user_id"), message.get("session_id"))
+        logger.warning(f"Dropping a chat message for deleted chat {message['chat_id']}")
+    return kept
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_message_buffer():
+    """Returns the process-wide buffer, or None when write-behind is disabled."""
+    global _buffer
+    config = getattr(settings, "CHAT_WRITE_BUFFER", {})
+    if not config.get("ENABLED", False):
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                buffer = MessageBuffer(
+                    max_batch=config.get("MAX_BATCH", 100),
+                    flush_interval=config.get("FLUSH_INTERVAL", 0.5),
+                    spill_dir=config.get("SPILL_DIR"),
+                )
+                buffer.start()
+                _buffer = buffer
+    return _buffer
+
+
+def save_message(user, session_id, sender, text):
+    """
+    Queues a chat message for a batched insert (or inserts it now when buffering
+    is off), creating the user's session on first use. Returns the chat id.
+    """
+    text = _storable(text)
+    chat_id = resolve_chat_id(user, session_id)
+    buffer = get_message_buffer()
+    if buffer is not None:
+        buffer.add(chat_id, sender, text, user_id=user.id, session_id=session_id)
+        return chat_id
+    try:
+        with transaction.atomic():
+            Message.objects.create(chat_id=chat_id, sender=sender, text=text, client_id=uuid.uuid4())
+    except IntegrityError:
+        # The cached chat was deleted by another process; recreate it like a first message would
+        forget_chat_key(user.id, session_id)
+        chat_id = resolve_chat_id(user, session_id)
+        Message.objects.create(chat_id=chat_id, sender=sender, text=text, client_id=uuid.uuid4())
+    return chat_id
+
+
+async def asave_message(user, session_id, sender, text):
+    text = _storable(text)
+    buffer = get_message_buffer()
+    if buffer is None:
+        return await sync_to_async(save_message)(user, session_id, sender, text)
+    chat_id = _cached_chat_id(user.id, session_id)
+    if chat_id is None:
+        chat_id = await sync_to_async(resolve_chat_id)(user, session_id)
+    buffer.add(chat_id, sender, text, user_id=user.id, session_id=session_id)
+    return chat_id
+
+
+def _storable(text):
+    # JSON bodies can carry "\u0000", which PostgreSQL text columns cannot store
+    return text.replace("\x00", "") if text else text
+
+
+def pending_messages(chat_ids):
+    buffer = get_message_buffer()
+    return buffer.pending_for(chat_ids) if buffer is not None else {}
+
+
+# (user id, session id) -> ChatSession id, so repeat messages skip get_or_create.
+_known_chats = OrderedDict()
+_known_chats_lock = threading.Lock()
+KNOWN_CHATS_MAX = 10000
+
+
+def _cached_chat_id(user_id, session_id):
+    with _known_chats_lock:
+        return _known_chats.get((user_id, session_id))
+
+
+def resolve_chat_id(user, session_id):
+    """Returns the id of the user's ChatSession, creating it on first use."""
+    key = (user.id, session_id)
+    chat_id = _cached_chat_id(*key)
+    if chat_id is None:
+        chat_id = ChatSession.objects.get_or_create(user=user, session_id=session_id)[0].id
+        with _known_chats_lock:
+            _known_chats[key] = chat_id
+            while len(_known_chats) > KNOWN_CHATS_MAX:
+                _known_chats.popitem(last=False)
+    return chat_id
+
+
+def forget_chat_key(user_id, session_id):
+    """Drops a cached (user id, session id) -> chat id entry, e.g. after the chat was found deleted."""
+    with _known_chats_lock:
+        _known_chats.pop((user_id, session_id), None)
+
+
+def forget_chat(chat):
+    """Call when a chat is deleted so buffered and cached state for it is dropped."""
+    forget_chat_key(chat.user_id, chat.session_id)
+    buffer = get_message_buffer()
+    if buffer is not None:
+        buffer.discard_chat(chat.id)
@@ -0,0 +1,236 @@
+"""
+Cache for chatbot replies keyed on the normalized message text.
+
+Many users send the same questions, and each one costs a Dialogflow call and
+often a paid GPT call. Replies are cached with a TTL and LRU eviction, and
+identical prompts that arrive while the first one is still being answered wait
+for that answer instead of calling upstream again (single-flight).
+"""
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(text):
+    """Lowercases, drops punctuation and collapses whitespace: 'What is PCOS??' -> 'what is pcos'."""
+    # Phone keyboards type the curly apostrophe: "what’s" must read as "what's", not "what s"
+    text = _PUNCTUATION.sub(" ", (text or "").lower().replace("\u2019", "'"))
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class LocalMemoryBackend:
+    """In-process LRU store with per-entry expiry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value, ttl):
+        self.set(key, value, ttl)
+
+
+class DjangoCacheBackend:
+    """
+    Stores replies in a Django cache alias, e.g. a FileBasedCache or DatabaseCache
+    shared by all workers. Eviction follows the alias' MAX_ENTRIES/CULL_FREQUENCY.
+    """
+
+    def __init__(self, alias="default"):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, value, ttl)
+
+    def __len__(self):
+        return 0  # Not cheaply known for shared caches
+
+    async def aget(self, key):
+        return await sync_to_async(self.get)(key)
+
+    async def aset(self, key, value, ttl):
+        await sync_to_async(self.set)(key, value, ttl)
+
+
+class _Flight:
+    """An upstream call in progress that identical prompts can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    Chatbot reply cache with single-flight coalescing.
+    `compute` callables return (reply, cacheable); uncacheable replies (errors,
+    context-dependent Dialogflow answers) are returned but not stored.
+    """
+
+    key_prefix = "chatbot-reply:"
+
+    def __init__(self, backend, ttl=3600):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._async_flights = {}
+        self._stats = Counter()
+
+    def make_key(self, message):
+        digest = hashlib.sha256(normalize_message(message).encode()).hexdigest()
+        return self.key_prefix + digest
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = {name: self._stats[name] for name in ("hits", "misses", "coalesced")}
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else 0.0
+        stats["entries"] = len(self.backend)
+        return stats
+
+    def get(self, message):
+        value = self.backend.get(self.make_key(message))
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, message, value):
+        self.backend.set(self.make_key(message), value, self.ttl)
+
+    def get_or_compute(self, message, compute):
+        key = self.make_key(message)
+        value = self.backend.get(key)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self._count("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        self._count("misses")
+        try:
+            value, cacheable = compute()
+            if cacheable:
+                self.backend.set(key, value, self.ttl)
+            flight.value = value
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def aget(self, message):
+        value = await self.backend.aget(self.make_key(message))
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    async def aset(self, message, value):
+        await self.backend.aset(self.make_key(message), value, self.ttl)
+
+    async def aget_or_compute(self, message, compute):
+        """Async get_or_compute; `compute` is a coroutine function."""
+        key = self.make_key(message)
+        value = await self.backend.aget(key)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        # Futures belong to one event loop, so in-flight calls are tracked per loop.
+        flight_key = (id(asyncio.get_running_loop()), key)
+        flight = self._async_flights.get(flight_key)
+        if flight is not None:
+            self._count("coalesced")
+            return await asyncio.shield(flight)
+
+        self._count("misses")
+        flight = self._async_flights[flight_key] = asyncio.get_running_loop().create_future()
+        try:
+            value, cacheable = await compute()
+            if cacheable:
+                await self.backend.aset(key, value, self.ttl)
+            flight.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            flight.exception()  # Mark retrieved so unawaited failures aren't logged
+            raise
+        finally:
+            self._async_flights.pop(flight_key, None)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide reply cache configured by settings.CHAT_RESPONSE_CACHE."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = getattr(settings, "CHAT_RESPONSE_CACHE", {})
+                if config.get("BACKEND", "local") == "django":
+                    backend = DjangoCacheBackend(config.get("CACHE_ALIAS", "default"))
+                else:
+                    backend = LocalMemoryBackend(config.get("MAX_ENTRIES", 1024))
+                _cache = ResponseCache(backend, ttl=config.get("TTL", 3600))
+    return _cache
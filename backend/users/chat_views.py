@@ -0,0 +1,595 @@
+"""
+Chatbot views: chat sessions and history, and the Dialogflow/OpenAI reply pipeline.
+
+Kept apart from users.views so that importing the rest of the app never pulls in
+the Google and OpenAI SDKs; those are loaded through users.ai_clients on the
+first chat message.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import namedtuple
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Prefetch, Q, Subquery
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .ai_clients import dialogflow_v2, get_async_openai_client, get_credentials, get_openai_client
+from .chat_buffer import asave_message, forget_chat, pending_messages, save_message
+from .chat_cache import get_response_cache
+from .dialogflow_pool import detect_intent_async, get_sessions_pool
+from .intents import answer_locally
+from .models import ChatSession, Message
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, parse_limit
+from .resilience import BREAKERS, CircuitOpenError, Deadline, DeadlineExpired, dialogflow_breaker, openai_breaker
+
+logger = logging.getLogger(__name__)
+
+# Dialogflow project ID
+DIALOGFLOW_PROJECT_ID = 'flourish-448006'  # Replace with your actual project ID
+
+USE_GPT_FALLBACK = True
+
+# Load OpenAI API Key
+OPENAI_API_KEY = settings.OPENAI_API_KEY
+
+# List of Dialogflow fallback responses
+DIALOGFLOW_FALLBACK_RESPONSES = [
+    "I don't understand", 
+    "", 
+    "What was that?",
+    "I didn't get that. Can you say it again?",
+    "I missed what you said.",
+    "What was that?",
+    "Sorry, what was that?",
+    "I missed that, say that again?"
+]
+
+GPT_SYSTEM_PROMPT = "You are a helpful AI assistant."
+CHAT_ERROR_REPLY = "I'm sorry, but I cannot respond at the moment."
+# Sent when the providers' breakers are open or the request deadline has passed
+DEGRADED_REPLY = CHAT_ERROR_REPLY + " I'm having trouble reaching my knowledge sources, please try again shortly."
+
+CHAT_REQUEST_DEADLINE = getattr(settings, "CHAT_REQUEST_DEADLINE", 15)
+DIALOGFLOW_TIMEOUT = getattr(settings, "DIALOGFLOW_TIMEOUT", 5)
+OPENAI_TIMEOUT = getattr(settings, "OPENAI_TIMEOUT", 12)
+
+
+def is_cacheable_reply(query_result, bot_reply):
+    """Replies that depend on Dialogflow session context, and error replies, are not cached."""
+    return not query_result.output_contexts and not bot_reply.startswith(CHAT_ERROR_REPLY)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def start_new_chat(request):
+    """Creates a new chat session and returns session_id."""
+    user = request.user  # Ensure user is logged in
+
+    try:
+        session_id = str(uuid.uuid4())  # Generate a unique session ID
+        chat_session = ChatSession.objects.create(user=user, session_id=session_id)
+
+        # ✅ Debugging: Check if the session is actually created
+        if chat_session:
+            print(f"✅ New chat session created: {chat_session.session_id} for user {user}")
+        else:
+            print("❌ Chat session creation failed.")
+
+        return JsonResponse({"session_id": session_id})  # ✅ Ensure session_id is returned
+
+    except Exception as e:
+        print(f"❌ Error creating chat session: {str(e)}")
+        return JsonResponse({"error": "Failed to create session"}, status=500)
+
+CHAT_HISTORY_PAGE_SIZE = 10
+CHAT_HISTORY_MAX_PAGE_SIZE = 50
+CHAT_MESSAGES_PER_SESSION = 50
+CHAT_MAX_MESSAGES_PER_SESSION = 200
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_chat_history(request):
+    """
+    Fetches the user's chat sessions, newest first, with their latest messages.
+    Each session's title is the text of its first message, however many
+    messages are returned.
+
+    Query params:
+      limit     sessions per page (default 10)
+      cursor    next_cursor from the previous page, to page back through older sessions
+      messages  max messages returned per session (default 50, most recent)
+      since     ISO timestamp; only sessions/messages written after it (delta sync).
+                Messages keep the time they were sent, so passing the previous
+                server_time never repeats a message this worker already returned.
+                A message still buffered by another worker is written with its
+                earlier send time; with several workers, sync from server_time
+                minus CHAT_WRITE_BUFFER FLUSH_INTERVAL and drop repeats by client_id.
+      session_id + before  page back through one session's older messages
+    """
+    user = request.user
+    params = request.query_params
+    message_limit = parse_limit(params.get("messages"), CHAT_MESSAGES_PER_SESSION, CHAT_MAX_MESSAGES_PER_SESSION)
+
+    since = None
+    if params.get("since"):
+        since = parse_datetime(params["since"])
+        if since is None:
+            return JsonResponse({"error": "Invalid since timestamp"}, status=400)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+    if params.get("session_id"):
+        return _get_session_messages(user, params["session_id"], params.get("before"), message_limit)
+
+    session_limit = parse_limit(params.get("limit"), CHAT_HISTORY_PAGE_SIZE, CHAT_HISTORY_MAX_PAGE_SIZE)
+    chats = ChatSession.objects.filter(user=user).order_by("-created_at", "-id")
+    if params.get("cursor"):
+        try:
+            created_at, chat_id = decode_cursor(params["cursor"], datetime, int)
+        except InvalidCursor:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+        chats = chats.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=chat_id))
+
+    messages = Message.objects.order_by("-timestamp", "-id")
+    if since is not None:
+        chats = chats.filter(
+            Q(created_at__gt=since) | Exists(Message.objects.filter(chat=OuterRef("pk"), timestamp__gt=since))
+        )
+        messages = messages.filter(timestamp__gt=since)
+
+    first_message = Message.objects.filter(chat=OuterRef("pk")).order_by("timestamp", "id").values("text")[:1]
+    # One query for the sessions and their titles and one for the latest messages of all of them;
+    # one message past the page tells whether a session has older ones
+    chats = list(
+        chats.only("id", "session_id", "created_at").annotate(title=Subquery(first_message)).prefetch_related(
+            Prefetch("messages", queryset=messages[: message_limit + 1], to_attr="recent_messages")
+        )[: session_limit + 1]
+    )
+    has_more = len(chats) > session_limit
+    chats = chats[:session_limit]
+
+    # Messages still in this process's write-behind buffer are included so clients read their own writes
+    pending = pending_messages(chat.id for chat in chats)
+    chat_data = []
+    for chat in chats:
+        chat_messages = [_message_data(message) for message in reversed(chat.recent_messages)]
+        chat_messages += _unwritten(pending.get(chat.id, []), chat_messages, since)
+        title = chat.title
+        if title is None and pending.get(chat.id):
+            title = pending[chat.id][0]["text"]  # The first message has not been written yet
+        chat_data.append({
+            "session_id": chat.session_id,
+            "title": title,
+            "messages": chat_messages[-message_limit:],
+            "has_more_messages": len(chat_messages) > message_limit,
+        })
+    next_cursor = encode_cursor(chats[-1].created_at, chats[-1].id) if has_more else None
+
+    return JsonResponse({"chats": chat_data, "next_cursor": next_cursor, "server_time": timezone.now()})
+
+
+def _message_data(message):
+    return {
+        "id": message.id,
+        "client_id": message.client_id,
+        "sender": message.sender,
+        "text": message.text,
+        "timestamp": message.timestamp,
+    }
+
+
+def _pending_message_data(message):
+    return {
+        "id": None,
+        "client_id": message["client_id"],
+        "sender": message["sender"],
+        "text": message["text"],
+        "timestamp": message["timestamp"],
+    }
+
+
+def _unwritten(pending, written, since=None):
+    """
+    Buffered messages not already among the written ones. A message flushed between
+    the query and the buffer read would otherwise be returned twice.
+    """
+    written_ids = {str(message["client_id"]) for message in written if message["client_id"]}
+    return [
+        _pending_message_data(message) for message in pending
+        if message["client_id"] not in written_ids and (since is None or message["timestamp"] > since)
+    ]
+
+
+def _get_session_messages(user, session_id, before, limit):
+    """Keyset page of one session's messages older than message id `before`."""
+    chat = ChatSession.objects.filter(user=user, session_id=session_id).only("id").first()
+    if chat is None:
+        return JsonResponse({"error": "Chat not found"}, status=404)
+
+    messages = Message.objects.filter(chat=chat).order_by("-timestamp", "-id")
+    if before:
+        anchor = Message.objects.filter(chat=chat, id=before).values("timestamp", "id").first() if before.isdigit() else None
+        if anchor is None:
+            return JsonResponse({"error": "Invalid before cursor"}, status=400)
+        messages = messages.filter(
+            Q(timestamp__lt=anchor["timestamp"]) | Q(timestamp=anchor["timestamp"], id__lt=anchor["id"])
+        )
+
+    page = list(messages[: limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    page_data = [_message_data(message) for message in reversed(page)]
+    if not before:
+        page_data += _unwritten(pending_messages([chat.id]).get(chat.id, []), page_data)
+    return JsonResponse({
+        "session_id": session_id,
+        "messages": page_data,
+        "before": page[-1].id if has_more else None,
+    })
+
+
+@api_view(['DELETE'])
+def delete_chat(request, session_id):
+    try:
+        chat = ChatSession.objects.get(session_id=session_id)
+        forget_chat(chat)
+        chat.delete()
+        return Response({"message": "Chat deleted successfully"}, status=status.HTTP_200_OK)
+    except ChatSession.DoesNotExist:
+        return Response({"error": "Chat not found"}, status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def chatbot_response(request):
+    """Handles chatbot response & stores messages in DB."""
+    user = request.user
+    data = json.loads(request.body)
+    user_message = data.get("message", "")
+    session_id = data.get("session_id")
+
+    print(f"📝 Received message: '{user_message}' for session {session_id}")
+
+    if not session_id:
+        return JsonResponse({"error": "No session ID provided"}, status=400)
+
+    # Store user message, creating the session if needed (inserted in the background by the write-behind buffer)
+    save_message(user, session_id, "user", user_message)
+
+    deadline = Deadline(CHAT_REQUEST_DEADLINE)
+
+    def compute_reply():
+        bot_reply, use_gpt, cacheable = _dialogflow_reply(user_message, session_id, deadline)
+
+        if use_gpt:
+            print("🔄 Triggering GPT fallback...")
+            bot_reply = get_gpt_response(user_message, deadline)
+            print(f"🔄 Final bot reply after fallback: '{bot_reply[:30]}...'")
+
+        return bot_reply, cacheable and not bot_reply.startswith(CHAT_ERROR_REPLY)
+
+    # Common intents are answered locally; identical questions come from the reply cache
+    bot_reply = answer_locally(user, user_message)
+    if bot_reply is None:
+        bot_reply = get_response_cache().get_or_compute(user_message, compute_reply)
+
+    # Store bot response
+    save_message(user, session_id, "bot", bot_reply)
+
+    return JsonResponse({"response": bot_reply})
+
+
+def _dialogflow_reply(user_message, session_id, deadline):
+    """
+    Returns (bot_reply, use_gpt, cacheable) for a message, asking Dialogflow first.
+    When Dialogflow is failing, slow or its breaker is open, hedges straight to GPT.
+    """
+    # Send message to Dialogflow
+    print("📡 Sending message to Dialogflow...")
+    dialogflow = dialogflow_v2()
+    session = dialogflow.SessionsClient.session_path(DIALOGFLOW_PROJECT_ID, session_id)
+    text_input = dialogflow.TextInput(text=user_message, language_code="en")
+    query_input = dialogflow.QueryInput(text=text_input)
+    try:
+        timeout = deadline.timeout(DIALOGFLOW_TIMEOUT)
+        response = dialogflow_breaker.call(lambda: get_sessions_pool(get_credentials()).detect_intent(
+            # retry=None: the client's own UNAVAILABLE retries would run far past the deadline
+            request={"session": session, "query_input": query_input}, timeout=timeout, retry=None
+        ))
+    except Exception as e:
+        logger.warning(f"Dialogflow unavailable ({e.__class__.__name__}), answering without it")
+        return None, True, False
+
+    bot_reply = response.query_result.fulfillment_text or "I didn't understand that."
+    intent_name = response.query_result.intent.display_name
+
+    print(f"🤖 Dialogflow replied: '{bot_reply}', Intent: '{intent_name}'")
+
+    # Fallback to GPT-3.5 if Dialogflow returns a fallback response
+    is_fallback = bot_reply in DIALOGFLOW_FALLBACK_RESPONSES or intent_name == "Default Fallback Intent"
+    print(f"🔄 Should use GPT fallback? {is_fallback}")
+
+    return bot_reply, USE_GPT_FALLBACK and is_fallback, is_cacheable_reply(response.query_result, bot_reply)
+
+
+def get_gpt_response(user_message, deadline=None):
+    """Fallback to OpenAI GPT-3.5 if Dialogflow fails."""
+    print(f"⚠️ Entering get_gpt_response with message: {user_message[:30]}...")
+    
+    if not OPENAI_API_KEY:
+        print("❌ No OpenAI API key found")
+        return "I'm sorry, but I cannot respond at the moment. (Missing API key)"
+        
+    if not USE_GPT_FALLBACK:
+        print("❌ GPT fallback is disabled")
+        return "I'm sorry, but I cannot respond at the moment. (Fallback disabled)"
+
+    print("✅ API key exists and fallback is enabled. Attempting API call...")
+    
+    try:
+        # Try with newer OpenAI client
+        print("📡 Attempting to use new OpenAI client...")
+        timeout = deadline.timeout(OPENAI_TIMEOUT) if deadline else OPENAI_TIMEOUT
+        client = get_openai_client()
+        completion = openai_breaker.call(lambda: client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": GPT_SYSTEM_PROMPT},
+                {"role": "user", "content": user_message}
+            ],
+            timeout=timeout,
+        ))
+        response_text = completion.choices[0].message.content
+        print(f"✅ OpenAI API call successful with new client. Response: {response_text[:30]}...")
+        return response_text
+    except (CircuitOpenError, DeadlineExpired) as e:
+        print(f"⚡ OpenAI skipped ({e.__class__.__name__}), sending degraded reply")
+        return DEGRADED_REPLY
+    except AttributeError as e:
+        print(f"⚠️ AttributeError with new client: {str(e)}. Trying legacy approach...")
+        # Fall back to legacy approach
+        try:
+            print("📡 Attempting to use legacy OpenAI API...")
+            import openai
+            response = openai.ChatCompletion.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": GPT_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message}
+                ]
+            )
+            response_text = response["choices"][0]["message"]["content"]
+            print(f"✅ OpenAI API call successful with legacy client. Response: {response_text[:30]}...")
+            return response_text
+        except Exception as e:
+            print(f"❌ Error with legacy OpenAI call: {str(e)}")
+            return f"I'm sorry, but I cannot respond at the moment. (API error: {str(e)[:50]}...)"
+    except Exception as e:
+        print(f"❌ Error with new OpenAI client: {str(e)}")
+        return f"I'm sorry, but I cannot respond at the moment. (Client error: {str(e)[:50]}...)"
+        
+
+async def authenticate_jwt_async(request):
+    """Authenticates a plain Django request with the same JWT scheme DRF uses."""
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0] if result else None
+
+
+ChatTurn = namedtuple("ChatTurn", ["user", "chat_id", "session_id", "message"])
+
+
+async def _start_chat_turn_async(request):
+    """
+    Authenticates and parses an async chat request and stores the user message.
+    Returns (ChatTurn, None) or (None, error_response).
+    """
+    if request.method != "POST":
+        return None, HttpResponseNotAllowed(["POST"])
+    user = await authenticate_jwt_async(request)
+    if user is None:
+        return None, JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return None, JsonResponse({"error": "Invalid JSON body"}, status=400)
+    user_message = data.get("message", "")
+    session_id = data.get("session_id")
+
+    if not session_id:
+        return None, JsonResponse({"error": "No session ID provided"}, status=400)
+
+    chat_id = await asave_message(user, session_id, "user", user_message)
+    return ChatTurn(user, chat_id, session_id, user_message), None
+
+
+async def _dialogflow_reply_async(user_message, session_id, deadline):
+    """Async _dialogflow_reply: (bot_reply, use_gpt, cacheable), hedging to GPT if Dialogflow is down."""
+    dialogflow = dialogflow_v2()
+    session = dialogflow.SessionsClient.session_path(DIALOGFLOW_PROJECT_ID, session_id)
+    text_input = dialogflow.TextInput(text=user_message, language_code="en")
+    query_input = dialogflow.QueryInput(text=text_input)
+    try:
+        timeout = deadline.timeout(DIALOGFLOW_TIMEOUT)
+        response = await dialogflow_breaker.acall(
+            lambda: detect_intent_async({"session": session, "query_input": query_input}, get_credentials(), timeout=timeout, retry=None),
+            timeout=timeout,
+        )
+    except Exception as e:
+        logger.warning(f"Dialogflow unavailable ({e.__class__.__name__}), answering without it")
+        return None, True, False
+
+    bot_reply = response.query_result.fulfillment_text or "I didn't understand that."
+    intent_name = response.query_result.intent.display_name
+    logger.info(f"Dialogflow replied with intent '{intent_name}' for session {session_id}")
+
+    is_fallback = bot_reply in DIALOGFLOW_FALLBACK_RESPONSES or intent_name == "Default Fallback Intent"
+    return bot_reply, USE_GPT_FALLBACK and is_fallback, is_cacheable_reply(response.query_result, bot_reply)
+
+
+async def chatbot_response_async(request):
+    """Async chatbot endpoint: the Dialogflow and OpenAI round trips don't hold a worker thread."""
+    turn, error = await _start_chat_turn_async(request)
+    if error:
+        return error
+
+    deadline = Deadline(CHAT_REQUEST_DEADLINE)
+
+    async def compute_reply():
+        bot_reply, use_gpt, cacheable = await _dialogflow_reply_async(turn.message, turn.session_id, deadline)
+        if use_gpt:
+            bot_reply = await get_gpt_response_async(turn.message, deadline)
+        return bot_reply, cacheable and not bot_reply.startswith(CHAT_ERROR_REPLY)
+
+    bot_reply = await sync_to_async(answer_locally)(turn.user, turn.message)
+    if bot_reply is None:
+        bot_reply = await get_response_cache().aget_or_compute(turn.message, compute_reply)
+
+    await asave_message(turn.user, turn.session_id, "bot", bot_reply)
+
+    return JsonResponse({"response": bot_reply})
+
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def chatbot_stream(request):
+    """
+    Streams the chatbot reply as Server-Sent Events.
+    Emits `token` events as GPT fallback tokens arrive, then a `done` event once
+    the assembled bot message has been saved.
+    """
+    turn, error = await _start_chat_turn_async(request)
+    if error:
+        return error
+
+    deadline = Deadline(CHAT_REQUEST_DEADLINE)
+
+    async def event_stream():
+        cache = get_response_cache()
+        try:
+            bot_reply = await sync_to_async(answer_locally)(turn.user, turn.message)
+            if bot_reply is None:
+                bot_reply = await cache.aget(turn.message)
+            if bot_reply is not None:
+                yield _sse_event("token", {"token": bot_reply})
+            else:
+                bot_reply, use_gpt, cacheable = await _dialogflow_reply_async(turn.message, turn.session_id, deadline)
+                if use_gpt:
+                    chunks = []
+                    async for token in stream_gpt_response_async(turn.message, deadline):
+                        chunks.append(token)
+                        yield _sse_event("token", {"token": token})
+                    bot_reply = "".join(chunks)
+                else:
+                    yield _sse_event("token", {"token": bot_reply})
+                if cacheable and not bot_reply.startswith(CHAT_ERROR_REPLY):
+                    await cache.aset(turn.message, bot_reply)
+        except Exception as e:
+            logger.error(f"Error streaming chatbot reply: {str(e)}")
+            bot_reply = CHAT_ERROR_REPLY
+            yield _sse_event("error", {"message": bot_reply})
+
+        await asave_message(turn.user, turn.session_id, "bot", bot_reply)
+        yield _sse_event("done", {"response": bot_reply})
+
+    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Stop nginx from buffering the stream
+    return response
+
+# Django 4.2's csrf_exempt decorator is sync-only; these are JWT-authenticated, so mark them directly.
+chatbot_response_async.csrf_exempt = True
+chatbot_stream.csrf_exempt = True
+
+
+async def stream_gpt_response_async(user_message, deadline):
+    """Yields GPT-3.5 fallback reply tokens as they arrive."""
+    if not OPENAI_API_KEY:
+        yield "I'm sorry, but I cannot respond at the moment. (Missing API key)"
+        return
+
+    try:
+        timeout = deadline.timeout(OPENAI_TIMEOUT)
+    except DeadlineExpired:
+        yield DEGRADED_REPLY
+        return
+    if not openai_breaker.allow():
+        yield DEGRADED_REPLY
+        return
+
+    try:
+        # The deadline bounds time to first token; each later chunk gets the same read timeout.
+        stream = await asyncio.wait_for(get_async_openai_client().chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": GPT_SYSTEM_PROMPT},
+                {"role": "user", "content": user_message}
+            ],
+            stream=True,
+            timeout=timeout,
+        ), timeout)
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception:
+        openai_breaker.record_failure()
+        raise
+    except BaseException:
+        # The client disconnected mid-stream (GeneratorExit / CancelledError); OpenAI did nothing wrong
+        openai_breaker.release()
+        raise
+    openai_breaker.record_success()
+
+
+async def get_gpt_response_async(user_message, deadline=None):
+    """Async fallback to OpenAI GPT-3.5 if Dialogflow fails."""
+    if not OPENAI_API_KEY:
+        return "I'm sorry, but I cannot respond at the moment. (Missing API key)"
+
+    try:
+        timeout = deadline.timeout(OPENAI_TIMEOUT) if deadline else OPENAI_TIMEOUT
+        completion = await openai_breaker.acall(
+            lambda: get_async_openai_client().chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": GPT_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message}
+                ],
+                timeout=timeout,
+            ),
+            timeout=timeout,
+        )
+        return completion.choices[0].message.content
+    except (CircuitOpenError, DeadlineExpired):
+        return DEGRADED_REPLY
+    except Exception as e:
+        logger.error(f"Error with async OpenAI client: {str(e)}")
+        return f"I'm sorry, but I cannot respond at the moment. (Client error: {str(e)[:50]}...)"
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def chat_breakers(request):
+    """Reports the state and trip counts of this process' provider circuit breakers."""
+    return Response({name: breaker.snapshot() for name, breaker in BREAKERS.items()}, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def chat_cache_stats(request):
+    """Reports this process' chatbot reply cache hit/miss counters."""
+    return Response(get_response_cache().stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,119 @@
+"""
+SymptomLog.cycle_day: days since the latest period that started on or before
+the log's date (day 1 is the start), or None before the user's first period.
+
+The value is stored on the log, so it goes stale when a period is logged,
+imported or deleted afterwards. The period writers in users.cycles and
+users.period_import call recompute_cycle_days for just the dates whose latest
+period changed. On PostgreSQL that is one UPDATE ... FROM with a LATERAL
+"latest period on or before this date" lookup per log; other backends
+(SQLite in development) recompute the range in Python with one read of the
+period starts.
+"""
+from bisect import bisect_right
+
+from django.db import connection
+from django.db.models import F, Q
+
+from .models import CycleStats, MenstrualData, SymptomLog
+
+RECOMPUTE_SQL = """
+UPDATE users_symptomlog AS log
+SET cycle_day = fresh.cycle_day
+FROM (
+    SELECT entry.id, entry.date - period.start_date + 1 AS cycle_day
+    FROM users_symptomlog entry
+    LEFT JOIN LATERAL (
+        SELECT start_date
+        FROM users_menstrualdata
+        WHERE user_id = entry.user_id AND start_date <= entry.date
+        ORDER BY start_date DESC
+        LIMIT 1
+    ) period ON TRUE
+    WHERE {where}
+) fresh
+WHERE log.id = fresh.id AND log.cycle_day IS DISTINCT FROM fresh.cycle_day
+RETURNING log.user_id
+"""
+
+
+def cycle_days_for(user_id, dates):
+    """
+    Returns {date: cycle_day} for the given dates. The period starts that
+    matter are read in one range query.
+    """
+    if not dates:
+        return {}
+    first, last = min(dates), max(dates)
+    periods = MenstrualData.objects.filter(user_id=user_id)
+    latest_before_first = (
+        periods.filter(start_date__lte=first).order_by("-start_date").values("start_date")[:1]
+    )
+    starts = sorted(set(
+        periods.filter(Q(start_date__gt=first, start_date__lte=last) | Q(start_date=latest_before_first))
+        .values_list("start_date", flat=True)
+    ))
+
+    cycle_days = {}
+    for day in dates:
+        position = bisect_right(starts, day)
+        cycle_days[day] = (day - starts[position - 1]).days + 1 if position else None
+    return cycle_days
+
+
+def _postgres_recompute(user_ids, start_date, end_date):
+    where, params = ["entry.user_id = ANY(%s)"], [list(user_ids)]
+    if start_date is not None:
+        where.append("entry.date >= %s")
+        params.append(start_date)
+    if end_date is not None:
+        where.append("entry.date < %s")
+        params.append(end_date)
+    with connection.cursor() as cursor:
+        cursor.execute(RECOMPUTE_SQL.format(where=" AND ".join(where)), params)
+        return [user_id for (user_id,) in cursor.fetchall()]
+
+
+def _python_recompute(user_ids, start_date, end_date):
+    changed_users = []
+    for user_id in user_ids:
+        logs = SymptomLog.objects.filter(user_id=user_id)
+        if start_date is not None:
+            logs = logs.filter(date__gte=start_date)
+        if end_date is not None:
+            logs = logs.filter(date__lt=end_date)
+        logs = list(logs.only("id", "date", "cycle_day"))
+
+        cycle_days = cycle_days_for(user_id, [log.date for log in logs])
+        stale = [log for log in logs if log.cycle_day != cycle_days[log.date]]
+        for log in stale:
+            log.cycle_day = cycle_days[log.date]
+        SymptomLog.objects.bulk_update(stale, ["cycle_day"], batch_size=1000)
+        changed_users.extend([user_id] * len(stale))
+    return changed_users
+
+
+def recompute_cycle_days(user_ids, start_date=None, end_date=None):
+    """
+    Reassigns cycle_day on the users' symptom logs dated start_date (inclusive)
+    to end_date (exclusive); either bound may be None for no limit. Bumps the
+    symptom version of every user whose logs changed, and returns how many
+    logs changed.
+    """
+    if connection.vendor == "postgresql":
+        changed = _postgres_recompute(user_ids, start_date, end_date)
+    else:
+        changed = _python_recompute(user_ids, start_date, end_date)
+
+    if changed:
+        # Cached symptom listings and reports show cycle_day, so their ETags must change
+        CycleStats.objects.filter(pk__in=set(changed)).update(symptoms_version=F("symptoms_version") + 1)
+    return len(changed)
+
+
+def next_start_after(user_id, start_date):
+    """Start date of the user's first period after start_date, or None."""
+    return (
+        MenstrualData.objects.filter(user_id=user_id, start_date__gt=start_date)
+        .order_by("start_date").values_list("start_date", flat=True).first()
+    )
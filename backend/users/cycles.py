@@ -0,0 +1,226 @@
+"""
+Menstrual cycle calculations shared by the tracker views and the chatbot.
+
+Predictions come from each user's CycleStats row, which the period views keep
+up to date as periods are logged and deleted, so reading one never scans the
+user's history.
+"""
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+
+from .cycle_days import next_start_after, recompute_cycle_days
+from .models import CycleStats, MenstrualData
+
+DEFAULT_CYCLE_LENGTH = 28
+
+
+def _refresh_prediction(stats):
+    """Recomputes the stored prediction from the running totals."""
+    if not stats.period_count:
+        stats.avg_cycle_length = stats.avg_period_length = None
+        stats.next_period_start = stats.next_period_end = None
+        stats.fertile_window_start = stats.fertile_window_end = None
+        return
+
+    # Use average cycle length if multiple periods exist. The gaps between
+    # consecutive starts add up to last_start - first_start.
+    if stats.period_count > 1:
+        avg_cycle_length = round((stats.last_start_date - stats.first_start_date).days / (stats.period_count - 1))
+    else:
+        avg_cycle_length = DEFAULT_CYCLE_LENGTH  # Default if only one record exists
+    stats.avg_cycle_length = avg_cycle_length or DEFAULT_CYCLE_LENGTH
+    stats.avg_period_length = round(stats.period_length_sum / stats.period_count)
+
+    # Predict from last cycle's end date
+    stats.next_period_start = stats.last_end_date + timedelta(days=stats.avg_cycle_length)
+    stats.next_period_end = stats.next_period_start + timedelta(days=stats.avg_period_length)
+    stats.fertile_window_start = stats.next_period_start - timedelta(days=14)
+    stats.fertile_window_end = stats.fertile_window_start + timedelta(days=5)
+
+
+def _load_totals(stats):
+    """Fills the running totals from the user's MenstrualData rows."""
+    periods = MenstrualData.objects.filter(user_id=stats.user_id)
+    totals = periods.aggregate(
+        count=Count("id"),
+        length_sum=Sum("period_length"),
+        first_start=Min("start_date"),
+        last_start=Max("start_date"),
+    )
+    stats.period_count = totals["count"]
+    stats.period_length_sum = totals["length_sum"] or 0
+    stats.first_start_date = totals["first_start"]
+    stats.last_start_date = totals["last_start"]
+    stats.last_end_date = (
+        periods.order_by("-start_date", "-end_date").values_list("end_date", flat=True).first()
+    )
+
+
+def _locked_stats(user_id):
+    """Returns the user's CycleStats row locked for update, building it if it does not exist yet."""
+    stats, created = CycleStats.objects.select_for_update().get_or_create(user_id=user_id)
+    if created:
+        _load_totals(stats)
+    return stats, created
+
+
+@transaction.atomic
+def rebuild_cycle_stats(user):
+    """Recomputes a user's CycleStats from scratch."""
+    stats, created = _locked_stats(user.pk)
+    if not created:
+        _load_totals(stats)
+    _refresh_prediction(stats)
+    stats.periods_version += 1
+    stats.save()
+    return stats
+
+
+def _previous_start(user_id, start_date, inclusive=False):
+    """Start date of the user's latest period before (or on, if inclusive) start_date."""
+    lookup = "start_date__lte" if inclusive else "start_date__lt"
+    periods = MenstrualData.objects.filter(user_id=user_id, **{lookup: start_date})
+    return periods.order_by("-start_date").values_list("start_date", flat=True).first()
+
+
+def cycle_length_for(user_id, start_date):
+    """Days since the user's previous period started, or the default for their first period."""
+    previous_start = _previous_start(user_id, start_date)
+    return (start_date - previous_start).days if previous_start else DEFAULT_CYCLE_LENGTH
+
+
+def _relink_next_period(user_id, start_date, previous_start):
+    """Recomputes the cycle length of the period(s) starting right after start_date."""
+    following = (
+        MenstrualData.objects.filter(user_id=user_id, start_date__gt=start_date)
+        .order_by("start_date").values_list("start_date", flat=True).first()
+    )
+    if following:
+        cycle_length = (following - previous_start).days if previous_start else DEFAULT_CYCLE_LENGTH
+        MenstrualData.objects.filter(user_id=user_id, start_date=following).update(cycle_length=cycle_length)
+
+
+@transaction.atomic
+def log_period(user, start_date, end_date, period_length):
+    """
+    Saves a new period. Its cycle length counts from the period before it, and
+    the period after it (when logged out of order) is re-linked to it. Only those
+    two rows are touched; CycleStats is updated in the same transaction.
+    """
+    stats, _ = _locked_stats(user.pk)  # Also serializes period writes for this user
+    period = MenstrualData.objects.create(
+        user=user,
+        start_date=start_date,
+        end_date=end_date,
+        period_length=period_length,
+        cycle_length=cycle_length_for(user.pk, start_date),
+    )
+    _relink_next_period(user.pk, start_date, start_date)
+
+    stats.period_count += 1
+    stats.period_length_sum += period.period_length
+    if stats.first_start_date is None or period.start_date < stats.first_start_date:
+        stats.first_start_date = period.start_date
+    if stats.last_start_date is None or (period.start_date, period.end_date) > (
+        stats.last_start_date, stats.last_end_date
+    ):
+        stats.last_start_date = period.start_date
+        stats.last_end_date = period.end_date
+    _refresh_prediction(stats)
+    stats.periods_version += 1
+    stats.save()
+
+    # Symptom logs from this start up to the next period now count from it
+    recompute_cycle_days([user.pk], start_date, next_start_after(user.pk, start_date))
+    return period
+
+
+@transaction.atomic
+def delete_period(period):
+    """Deletes a period, re-linking the next period to the one before it, and updates CycleStats."""
+    stats, _ = _locked_stats(period.user_id)
+    period.delete()
+    _relink_next_period(
+        period.user_id, period.start_date, _previous_start(period.user_id, period.start_date, inclusive=True)
+    )
+
+    if period.start_date in (stats.first_start_date, stats.last_start_date):
+        # The first or last period changed, so the new one has to be looked up
+        _load_totals(stats)
+    else:
+        stats.period_count -= 1
+        stats.period_length_sum -= period.period_length
+    _refresh_prediction(stats)
+    stats.periods_version += 1
+    stats.save()
+
+    # Symptom logs that counted from this period now count from the one before it
+    recompute_cycle_days(
+        [period.user_id], period.start_date, next_start_after(period.user_id, period.start_date)
+    )
+
+
+def get_cycle_stats(user):
+    """Returns the user's CycleStats, building it on first use."""
+    stats = CycleStats.objects.filter(pk=user.pk).first()
+    if stats is None:
+        stats = rebuild_cycle_stats(user)
+    return stats
+
+
+def predict_next_cycle(user):
+    """
+    Predicts the user's next period and fertile window from past cycle lengths.
+    Returns None when the user has not logged any periods.
+    """
+    stats = get_cycle_stats(user)
+    if not stats.period_count:
+        return None
+
+    # Calculate cycle progress
+    today = datetime.now().date()
+    days_since_last_period = (today - stats.last_end_date).days
+    cycle_progress = (days_since_last_period / stats.avg_cycle_length) * 100
+
+    return {
+        "next_period_start": stats.next_period_start,
+        "next_period_end": stats.next_period_end,
+        "fertile_window_start": stats.fertile_window_start,
+        "fertile_window_end": stats.fertile_window_end,
+        "cycle_progress": min(cycle_progress, 100),
+    }
+
+
+def predicted_cycles(user, start_date, end_date):
+    """
+    Predicted periods and fertile windows that overlap start_date..end_date,
+    repeating the next predicted cycle every average cycle length.
+    """
+    stats = get_cycle_stats(user)
+    if not stats.period_count:
+        return []
+
+    cycle = timedelta(days=stats.avg_cycle_length)
+    period_start = stats.next_period_start
+    if period_start < start_date:
+        # Skip whole cycles that end before the window
+        skipped = ((start_date - period_start) // cycle) - 1
+        period_start += cycle * max(skipped, 0)
+
+    cycles = []
+    while True:
+        offset = period_start - stats.next_period_start
+        fertile_window_start = stats.fertile_window_start + offset
+        if fertile_window_start > end_date:  # The fertile window comes before the period
+            return cycles
+        period_end = stats.next_period_end + offset
+        if period_end >= start_date:
+            cycles.append({
+                "period_start": period_start,
+                "period_end": period_end,
+                "fertile_window_start": fertile_window_start,
+                "fertile_window_end": stats.fertile_window_end + offset,
+            })
+        period_start += cycle
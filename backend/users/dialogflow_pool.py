@@ -0,0 +1,164 @@
+"""
+Process-wide pool of Dialogflow SessionsClient instances.
+
+Building a SessionsClient opens a new gRPC channel, which costs a TLS handshake
+and an OAuth token exchange. The pool creates a handful of clients lazily, keeps
+their channels alive between chat messages and replaces a client whose channel
+has failed. The async chat endpoint shares one SessionsAsyncClient per event loop.
+
+The Google client libraries are imported on first use, not at import time.
+"""
+import asyncio
+import itertools
+import logging
+import threading
+import weakref
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Ping idle channels so that load balancers and NATs do not silently drop them.
+KEEPALIVE_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+]
+
+
+def reconnect_errors():
+    """Errors that mean the channel itself is broken, so the client must be rebuilt."""
+    from google.api_core import exceptions as api_exceptions
+    return (api_exceptions.ServiceUnavailable, api_exceptions.Unauthenticated)
+
+
+def _create_channel(host, **kwargs):
+    """Channel factory that adds keepalive options to the transport defaults."""
+    from google.cloud.dialogflow_v2.services.sessions.transports import SessionsGrpcTransport
+    options = dict(kwargs.pop("options", None) or [])
+    options.update(KEEPALIVE_OPTIONS)
+    return SessionsGrpcTransport.create_channel(host, options=list(options.items()), **kwargs)
+
+
+def _create_async_channel(host, **kwargs):
+    from google.cloud.dialogflow_v2.services.sessions.transports import SessionsGrpcAsyncIOTransport
+    options = dict(kwargs.pop("options", None) or [])
+    options.update(KEEPALIVE_OPTIONS)
+    return SessionsGrpcAsyncIOTransport.create_channel(host, options=list(options.items()), **kwargs)
+
+
+def build_sessions_client(credentials=None):
+    """Creates a SessionsClient whose channel uses keepalive."""
+    from google.cloud import dialogflow_v2 as dialogflow
+    from google.cloud.dialogflow_v2.services.sessions.transports import SessionsGrpcTransport
+    transport = SessionsGrpcTransport(credentials=credentials, channel=_create_channel)
+    return dialogflow.SessionsClient(transport=transport)
+
+
+class SessionsClientPool:
+    """Round-robin pool of lazily created, shared SessionsClient instances."""
+
+    def __init__(self, factory, size=4):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.size = size
+        self._factory = factory
+        self._clients = [None] * size
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def acquire(self):
+        """Returns (slot, client), creating the client for that slot on first use."""
+        slot = next(self._counter) % self.size
+        client = self._clients[slot]
+        if client is None:
+            with self._lock:
+                client = self._clients[slot]
+                if client is None:
+                    client = self._factory()
+                    self._clients[slot] = client
+        return slot, client
+
+    def discard(self, slot, client):
+        """Drops a broken client so that the next acquire() reconnects."""
+        with self._lock:
+            if self._clients[slot] is not client:
+                return
+            self._clients[slot] = None
+        try:
+            client.transport.close()
+        except Exception as e:
+            logger.warning(f"Error closing Dialogflow channel: {str(e)}")
+
+    def detect_intent(self, request, retries=1, **kwargs):
+        """Calls detect_intent on a pooled client, reconnecting on channel failures."""
+        for attempt in range(retries + 1):
+            slot, client = self.acquire()
+            try:
+                return client.detect_intent(request=request, **kwargs)
+            except reconnect_errors() as e:
+                logger.warning(f"Dialogflow channel failed ({e.__class__.__name__}), reconnecting")
+                self.discard(slot, client)
+                if attempt == retries:
+                    raise
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, [None] * self.size
+        for client in clients:
+            if client is not None:
+                client.transport.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_sessions_pool(credentials=None):
+    """Returns the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SessionsClientPool(
+                    lambda: build_sessions_client(credentials),
+                    size=getattr(settings, "DIALOGFLOW_CLIENT_POOL_SIZE", 4),
+                )
+    return _pool
+
+
+# grpc.aio channels are bound to the event loop that created them, so async
+# clients are shared per loop (one per worker process under an ASGI server).
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_sessions_client(credentials=None):
+    """Returns the SessionsAsyncClient shared by the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from google.cloud import dialogflow_v2 as dialogflow
+        from google.cloud.dialogflow_v2.services.sessions.transports import SessionsGrpcAsyncIOTransport
+        transport = SessionsGrpcAsyncIOTransport(credentials=credentials, channel=_create_async_channel)
+        client = dialogflow.SessionsAsyncClient(transport=transport)
+        _async_clients[loop] = client
+    return client
+
+
+async def detect_intent_async(request, credentials=None, retries=1, **kwargs):
+    """Async counterpart of SessionsClientPool.detect_intent."""
+    loop = asyncio.get_running_loop()
+    for attempt in range(retries + 1):
+        client = get_async_sessions_client(credentials)
+        try:
+            return await client.detect_intent(request=request, **kwargs)
+        except reconnect_errors() as e:
+            logger.warning(f"Dialogflow async channel failed ({e.__class__.__name__}), reconnecting")
+            if _async_clients.get(loop) is client:
+                del _async_clients[loop]
+                await client.transport.close()
+            if attempt == retries:
+                raise
@@ -0,0 +1,168 @@
+"""
+Batch cycle forecasting for every user at once.
+
+MenstrualData is streamed from one query ordered by user and start date and cut
+into batches at user boundaries. Each batch is turned into flat NumPy arrays and
+all per-user statistics and the next-N-cycle forecasts are computed with
+array operations (np.diff, np.add.reduceat, broadcasting), without a Python
+loop over users. Forecasts use the same averages as predict_next_cycle, plus
+the cycle-length standard deviation.
+"""
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .cycles import DEFAULT_CYCLE_LENGTH
+from .models import CycleForecast, MenstrualData
+
+FORECAST_HORIZON = getattr(settings, "CYCLE_FORECAST_HORIZON", 6)
+BATCH_ROWS = 50000
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def iter_period_batches(batch_rows=BATCH_ROWS, user_ids=None):
+    """
+    Yields (user_ids, starts, ends, period_lengths) arrays of about batch_rows
+    periods each, sorted by user and start date. A user is never split across
+    batches. Dates are day ordinals.
+    """
+    periods = MenstrualData.objects.order_by("user_id", "start_date", "end_date")
+    if user_ids is not None:
+        periods = periods.filter(user_id__in=user_ids)
+    rows = periods.values_list("user_id", "start_date", "end_date", "period_length")
+
+    batch = []
+    for row in rows.iterator(chunk_size=batch_rows):
+        if len(batch) >= batch_rows and row[0] != batch[-1][0]:
+            yield _to_arrays(batch)
+            batch = []
+        batch.append(row)
+    if batch:
+        yield _to_arrays(batch)
+
+
+def _to_arrays(rows):
+    n = len(rows)
+    user_ids, starts, ends, lengths = zip(*rows)
+    return (
+        np.fromiter(user_ids, dtype=np.int64, count=n),
+        np.fromiter((d.toordinal() for d in starts), dtype=np.int64, count=n),
+        np.fromiter((d.toordinal() for d in ends), dtype=np.int64, count=n),
+        np.fromiter(lengths, dtype=np.float64, count=n),
+    )
+
+
+def forecast_batch(user_ids, starts, ends, period_lengths, horizon=FORECAST_HORIZON):
+    """
+    Computes per-user averages, cycle-length variability and the next `horizon`
+    cycles for one batch from iter_period_batches. Returns a dict of arrays with
+    one row per user; the date arrays have shape (users, horizon).
+    """
+    n = len(user_ids)
+    first = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+    last = np.r_[first[1:], n] - 1
+    period_counts = last - first + 1
+    cycle_counts = period_counts - 1
+
+    # gaps[i] is the cycle from period i to period i + 1. The gap after a user's
+    # last period would cross into the next user, so it is zeroed.
+    gaps = np.zeros(n, dtype=np.float64)
+    gaps[:-1] = np.diff(starts)
+    gaps[last] = 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # The gaps between consecutive starts add up to last_start - first_start
+        mean_cycle = (starts[last] - starts[first]) / cycle_counts
+        variance = np.add.reduceat(gaps ** 2, first) / cycle_counts - mean_cycle ** 2
+
+    avg_cycle = np.where(cycle_counts > 0, np.rint(mean_cycle), DEFAULT_CYCLE_LENGTH)
+    avg_cycle[avg_cycle <= 0] = DEFAULT_CYCLE_LENGTH
+    avg_cycle = avg_cycle.astype(np.int64)
+    cycle_std = np.where(cycle_counts > 1, np.sqrt(np.maximum(variance, 0)), np.nan)
+    avg_period = np.rint(np.add.reduceat(period_lengths, first) / period_counts).astype(np.int64)
+
+    # Predict from the last period's end, one average cycle per step
+    steps = np.arange(1, horizon + 1)
+    period_start = ends[last][:, None] + avg_cycle[:, None] * steps
+    period_end = period_start + avg_period[:, None]
+    fertile_window_start = period_start - 14
+    fertile_window_end = fertile_window_start + 5
+
+    return {
+        "user_id": user_ids[first],
+        "avg_cycle_length": avg_cycle,
+        "cycle_length_std": cycle_std,
+        "period_start": period_start,
+        "period_end": period_end,
+        "fertile_window_start": fertile_window_start,
+        "fertile_window_end": fertile_window_end,
+    }
+
+
+def _to_dates(ordinals):
+    """Day ordinals to datetime.date objects, converted in one go through datetime64."""
+    return (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]").tolist()
+
+
+def save_forecasts(forecast, generated_at):
+    """Upserts one CycleForecast row per user and step with a single bulk statement per batch."""
+    users, horizon = forecast["period_start"].shape
+    columns = {
+        name: _to_dates(forecast[name].ravel())
+        for name in ("period_start", "period_end", "fertile_window_start", "fertile_window_end")
+    }
+    user_ids = np.repeat(forecast["user_id"], horizon).tolist()
+    avg_cycles = np.repeat(forecast["avg_cycle_length"], horizon).tolist()
+    stds = [
+        None if np.isnan(std) else round(std, 2)
+        for std in np.repeat(forecast["cycle_length_std"], horizon).tolist()
+    ]
+    sequences = np.tile(np.arange(1, horizon + 1), users).tolist()
+
+    rows = [
+        CycleForecast(
+            user_id=user_ids[i],
+            sequence=sequences[i],
+            period_start=columns["period_start"][i],
+            period_end=columns["period_end"][i],
+            fertile_window_start=columns["fertile_window_start"][i],
+            fertile_window_end=columns["fertile_window_end"][i],
+            avg_cycle_length=avg_cycles[i],
+            cycle_length_std=stds[i],
+            generated_at=generated_at,
+        )
+        for i in range(users * horizon)
+    ]
+    CycleForecast.objects.bulk_create(
+        rows,
+        batch_size=5000,
+        update_conflicts=True,
+        unique_fields=["user", "sequence"],
+        update_fields=[
+            "period_start", "period_end", "fertile_window_start", "fertile_window_end",
+            "avg_cycle_length", "cycle_length_std", "generated_at",
+        ],
+    )
+    return len(rows)
+
+
+def run_forecasts(horizon=FORECAST_HORIZON, batch_rows=BATCH_ROWS, user_ids=None):
+    """
+    Forecasts every user (or just `user_ids`) batch by batch, yielding
+    (users, periods, forecasts) counts after each batch is saved. Forecasts
+    left over from earlier runs, for users who no longer have periods or for
+    steps past `horizon`, are deleted at the end.
+    """
+    generated_at = timezone.now()
+    for user_batch, starts, ends, lengths in iter_period_batches(batch_rows, user_ids):
+        forecast = forecast_batch(user_batch, starts, ends, lengths, horizon)
+        saved = save_forecasts(forecast, generated_at)
+        yield len(forecast["user_id"]), len(user_batch), saved
+
+    stale = CycleForecast.objects.filter(generated_at__lt=generated_at)
+    if user_ids is not None:
+        stale = stale.filter(user_id__in=user_ids)
+    stale.delete()
@@ -0,0 +1,125 @@
+"""
+In-process intent classifier for the most common chatbot questions.
+
+Greetings, period/fertile-window predictions and article lookups are matched
+by one compiled regex (built once at import) and answered locally, so only the
+remaining messages pay for a Dialogflow and possibly a GPT round trip.
+"""
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Q
+
+from .chat_cache import normalize_message
+from .cycles import predict_next_cycle
+from .models import Article
+
+IntentMatch = namedtuple("IntentMatch", ["intent", "confidence", "slots"])
+
+# The optional trailing word is only a greeting when it is the user's bot name ("hi luna");
+# _greeting_reply hands anything else ("hi cramps", "hey stop") on to Dialogflow.
+_GREETING = r"(?:hi|hello|hey|hiya|howdy|good (?:morning|afternoon|evening))(?: there)?(?: (?P<bot_name>\w+))?"
+_PERIOD = (
+    r"(?:when (?:is|will|should) (?:my )?(?:next )?period(?: start| come| be| due)?"
+    r"|when will i (?:get|have|start) my (?:next )?period"
+    r"|(?:predict|show me|what is|what'?s) my next period"
+    r"|next period(?: date| prediction)?)"
+)
+_FERTILE = (
+    r"(?:when (?:is|will be) my (?:next )?(?:fertile window|fertile days|ovulation)"
+    r"|when (?:do|will) i ovulate(?: next)?"
+    r"|(?:what is|what'?s|show me) my (?:fertile window|ovulation date)"
+    r"|(?:my )?fertile window)"
+)
+_ARTICLES = (
+    r"(?:(?:show|find|give|recommend|suggest|send)(?: me)? (?:some |an |any )?"
+    r"|(?:are there|do you have) (?:any )?)?"
+    r"(?:articles?|resources?|reading) (?:about|on|for) (?P<topic>[\w' ]{3,60})"
+)
+
+# Rules are (intent, pattern, confidence); every pattern must match the whole
+# normalized message, so partial keyword hits fall through to Dialogflow.
+RULES = [
+    ("greeting", _GREETING, 1.0),
+    ("period_prediction", _PERIOD, 0.95),
+    ("fertile_window", _FERTILE, 0.95),
+    ("article_lookup", _ARTICLES, 0.9),
+]
+
+
+class IntentClassifier:
+    def __init__(self, rules):
+        self.confidence = {intent: confidence for intent, _, confidence in rules}
+        # One alternation with a named group per intent: a single regex pass per message.
+        self.pattern = re.compile("|".join(f"(?P<{intent}>{pattern})" for intent, pattern, _ in rules))
+
+    def classify(self, message):
+        """Returns an IntentMatch for the normalized message, or None."""
+        match = self.pattern.fullmatch(normalize_message(message))
+        if match is None:
+            return None
+        intent = match.lastgroup
+        slots = {name: value for name, value in match.groupdict().items() if value and name not in self.confidence}
+        return IntentMatch(intent, self.confidence[intent], slots)
+
+
+classifier = IntentClassifier(RULES)
+
+
+def _greeting_reply(user, slots):
+    if "bot_name" in slots and slots["bot_name"] != user.preferred_bot_name.lower():
+        return None
+    return f"Hi! I'm {user.preferred_bot_name}. How can I help you today?"
+
+
+def _period_reply(user, slots):
+    prediction = predict_next_cycle(user)
+    if prediction is None:
+        return "Log your first period in the tracker and I'll be able to predict your next one."
+    return (
+        f"Your next period is expected to start around {prediction['next_period_start']:%B %d} "
+        f"and end around {prediction['next_period_end']:%B %d}."
+    )
+
+
+def _fertile_reply(user, slots):
+    prediction = predict_next_cycle(user)
+    if prediction is None:
+        return "Log your first period in the tracker and I'll be able to estimate your fertile window."
+    return (
+        f"Your next fertile window is estimated from {prediction['fertile_window_start']:%B %d} "
+        f"to {prediction['fertile_window_end']:%B %d}."
+    )
+
+
+def _articles_reply(user, slots):
+    topic = slots["topic"].strip()
+    articles = (
+        Article.objects.filter(Q(title__icontains=topic) | Q(keywords__icontains=topic))
+        .order_by("-published_date")
+        .values("title", "url")[:3]
+    )
+    if not articles:
+        return None  # Let Dialogflow/GPT handle topics we have no articles for
+    lines = [f"- {article['title']} ({article['url']})" for article in articles]
+    return f"Here are some articles about {topic}:\n" + "\n".join(lines)
+
+
+RESPONDERS = {
+    "greeting": _greeting_reply,
+    "period_prediction": _period_reply,
+    "fertile_window": _fertile_reply,
+    "article_lookup": _articles_reply,
+}
+
+
+def answer_locally(user, message):
+    """
+    Returns a reply for high-confidence local intents, or None when the message
+    should go to Dialogflow.
+    """
+    match = classifier.classify(message)
+    if match is None or match.confidence < getattr(settings, "LOCAL_INTENT_MIN_CONFIDENCE", 0.9):
+        return None
+    return RESPONDERS[match.intent](user, match.slots)
@@ -0,0 +1,93 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from users.article_search import search_articles
+from users.models import Article
+
+TOPICS = [
+    "menstrual", "cramps", "ovulation", "fertility", "hormone", "estrogen", "progesterone", "endometriosis",
+    "pcos", "iron", "anemia", "migraine", "fatigue", "nutrition", "exercise", "sleep", "stress", "acne",
+    "contraception", "pregnancy", "menopause", "thyroid", "insulin", "inflammation", "magnesium",
+]
+FILLER = [
+    "the", "patients", "study", "reported", "symptoms", "during", "women", "cycle", "health", "levels",
+    "clinical", "treatment", "effects", "daily", "risk", "common", "research", "body", "changes", "care",
+]
+QUERIES = ["endometriosis", "iron anemia", "\"sleep quality\"", "thyroid -pregnancy", "magnesium migraine"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ArticleListView's search (full-text on PostgreSQL, icontains elsewhere) against the old "
+        "icontains scan on generated articles, seeded in a transaction that is rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--articles", type=int, default=100000, help="Articles to seed")
+        parser.add_argument("--runs", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.monotonic()
+            self.seed(options["articles"])
+            self.stdout.write(f"Seeded {options['articles']} articles in {time.monotonic() - started:.1f}s")
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE users_article")
+
+            for text in QUERIES:
+                old = self.measure(lambda: self.legacy_search(text), options["runs"])
+                new = self.measure(lambda: list(search_articles(Article.objects.all(), text)), options["runs"])
+                found = len(search_articles(Article.objects.all(), text))
+                self.stdout.write(
+                    f"{text!r:>24}: old icontains mean {statistics.mean(old):8.1f} ms | "
+                    f"new mean {statistics.mean(new):7.1f} ms ({found} results) | "
+                    f"{statistics.mean(old) / statistics.mean(new):.1f}x"
+                )
+
+            if connection.vendor == "postgresql":
+                plan = search_articles(Article.objects.all(), QUERIES[0]).explain()
+                uses_index = "users_article_search_vector_idx" in plan
+                self.stdout.write(f"GIN index used: {uses_index}")
+
+            transaction.set_rollback(True)  # Never keep the seeded rows
+
+    def seed(self, count):
+        published = timezone.now()
+        articles = []
+        for i in range(count):
+            topics = random.sample(TOPICS, 3)
+            words = [random.choice(FILLER) for _ in range(150)]
+            for topic in topics:
+                words[random.randrange(len(words))] = topic
+            if random.random() < 0.05:
+                words[10:12] = ["sleep", "quality"]
+            articles.append(Article(
+                title=f"{topics[0].title()} and {topics[1]}: article {i}",
+                source="Benchmark",
+                url=f"https://example.com/bench/{i}",
+                content=" ".join(words),
+                published_date=published,
+                keywords=", ".join(topics),
+            ))
+            if len(articles) == 5000:
+                Article.objects.bulk_create(articles)
+                articles = []
+        Article.objects.bulk_create(articles)
+
+    def legacy_search(self, text):
+        """The search as ArticleListView ran it before: an unranked icontains scan returning every match."""
+        return list(Article.objects.filter(Q(title__icontains=text) | Q(content__icontains=text)))
+
+    def measure(self, search, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            search()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+from concurrent import futures
+
+import grpc
+from django.core.management.base import BaseCommand
+from google.cloud import dialogflow_v2 as dialogflow
+from google.cloud.dialogflow_v2.services.sessions.transports import SessionsGrpcTransport
+
+from users.dialogflow_pool import KEEPALIVE_OPTIONS, SessionsClientPool
+
+
+def start_stand_in_server(faults):
+    """
+    Starts a local gRPC server that answers Sessions.DetectIntent like Dialogflow.
+    `faults` is a dict read on every call: latency_ms delays each reply and
+    error_rate is the fraction of calls failed with UNAVAILABLE.
+    """
+    def detect_intent(request, context):
+        if faults.get("latency_ms"):
+            time.sleep(faults["latency_ms"] / 1000)
+        if faults.get("error_rate") and random.random() < faults["error_rate"]:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Injected failure")
+        return dialogflow.DetectIntentResponse(
+            query_result=dialogflow.QueryResult(
+                query_text=request.query_input.text.text,
+                fulfillment_text="Hello! How can I help you today?",
+                intent=dialogflow.Intent(display_name="Default Welcome Intent"),
+            )
+        )
+
+    handler = grpc.method_handlers_generic_handler(
+        "google.cloud.dialogflow.v2.Sessions",
+        {
+            "DetectIntent": grpc.unary_unary_rpc_method_handler(
+                detect_intent,
+                request_deserializer=dialogflow.DetectIntentRequest.deserialize,
+                response_serializer=dialogflow.DetectIntentResponse.serialize,
+            )
+        },
+    )
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, f"127.0.0.1:{port}"
+
+
+class Command(BaseCommand):
+    help = "Compare per-message Dialogflow clients with the pooled client against a local gRPC stand-in"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200, help="Chat messages to send per mode")
+        parser.add_argument("--latency-ms", type=float, default=0, help="Simulated server processing time")
+        parser.add_argument("--pool-size", type=int, default=4)
+
+    def handle(self, *args, **options):
+        server, address = start_stand_in_server({"latency_ms": options["latency_ms"]})
+
+        def factory():
+            channel = grpc.insecure_channel(address, options=KEEPALIVE_OPTIONS)
+            return dialogflow.SessionsClient(transport=SessionsGrpcTransport(channel=channel))
+
+        def per_message_call(request):
+            # Old behaviour: a new client (and channel) for every chat message.
+            client = factory()
+            try:
+                return client.detect_intent(request=request)
+            finally:
+                client.transport.close()
+
+        pool = SessionsClientPool(factory, size=options["pool_size"])
+        try:
+            before = self.measure(per_message_call, options["messages"])
+            after = self.measure(pool.detect_intent, options["messages"])
+        finally:
+            pool.close()
+            server.stop(None)
+
+        self.report("per-message client", before)
+        self.report("pooled client", after)
+        self.stdout.write(self.style.SUCCESS(
+            f"Mean speedup: {statistics.mean(before) / statistics.mean(after):.1f}x"
+        ))
+
+    def measure(self, call, messages):
+        session = dialogflow.SessionsClient.session_path("bench-project", "bench-session")
+        timings = []
+        for i in range(messages):
+            request = {
+                "session": session,
+                "query_input": dialogflow.QueryInput(text=dialogflow.TextInput(text=f"hello {i}", language_code="en")),
+            }
+            started = time.perf_counter()
+            call(request)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f"{label:>20}: mean {statistics.mean(timings):.2f} ms, "
+            f"p50 {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms"
+        )
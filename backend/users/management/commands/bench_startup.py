@@ -0,0 +1,70 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+HEAVY_MODULES = ("google.cloud.dialogflow_v2", "google.oauth2", "openai", "numpy")
+
+
+class Command(BaseCommand):
+    help = (
+        "Time cold starts in fresh interpreters: `manage.py check` and importing the WSGI app "
+        "(which loads every URLconf and view module), and list the slowest imports"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+        parser.add_argument("--top", type=int, default=15, help="Slowest imports to list (0 to skip)")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "backend.settings"))
+        manage_py = os.path.join(settings.BASE_DIR, "manage.py")
+        load_app = (
+            "import sys, backend.wsgi, django.urls; django.urls.get_resolver().url_patterns; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+
+        self.report("manage.py check", self.measure([sys.executable, manage_py, "check"], env, options["runs"]))
+        self.report("import wsgi + urls", self.measure([sys.executable, "-c", load_app], env, options["runs"]))
+
+        loaded = self.run([sys.executable, "-c", load_app], env).stdout.strip()
+        if loaded:
+            self.stdout.write(self.style.WARNING(f"Loaded at startup: {loaded}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No Dialogflow/OpenAI SDK or NumPy modules are loaded at startup."))
+
+        if options["top"]:
+            self.show_slowest_imports([sys.executable, "-X", "importtime", "-c", load_app], env, options["top"])
+
+    def run(self, cmd, env):
+        return subprocess.run(cmd, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+
+    def measure(self, cmd, env, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            self.run(cmd, env)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f"{label:>20}: mean {statistics.mean(timings):.0f} ms, "
+            f"min {min(timings):.0f} ms, max {max(timings):.0f} ms"
+        )
+
+    def show_slowest_imports(self, cmd, env, top):
+        # -X importtime writes "import time: self [us] | cumulative | imported package" to stderr.
+        rows = []
+        for line in self.run(cmd, env).stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) != 3 or not parts[1].strip().isdigit():
+                continue
+            rows.append((int(parts[1]), parts[2].strip()))
+        self.stdout.write("Slowest imports (cumulative):")
+        for cumulative, module in sorted(rows, reverse=True)[:top]:
+            self.stdout.write(f"  {cumulative / 1000:8.1f} ms  {module}")
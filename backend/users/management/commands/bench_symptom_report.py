@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from users.models import CustomUser, SymptomLog
+from users.symptom_report import build_symptom_report
+
+SYMPTOMS = [
+    "Cramps", "Headache", "Fatigue", "Bloating", "Acne", "Back pain", "Nausea", "Mood swings",
+    "Tender breasts", "Insomnia", "Cravings", "Anxiety", "Dizziness", "Spotting", "Irritability",
+]
+
+
+def legacy_report(user):
+    """The report as SymptomReportView built it before: two Python passes and list(set(...)) per row."""
+    logs = SymptomLog.objects.filter(user=user, cycle_day__isnull=False).order_by('cycle_day')
+    if not logs.exists():
+        return None
+    symptoms_by_cycle_day = {}
+    for log in logs:
+        cycle_day = str(log.cycle_day)
+        if cycle_day not in symptoms_by_cycle_day:
+            symptoms_by_cycle_day[cycle_day] = list(set(log.symptoms))
+        else:
+            symptoms_by_cycle_day[cycle_day] = list(set(symptoms_by_cycle_day[cycle_day] + log.symptoms))
+    symptom_cycle_days = {}
+    for log in logs:
+        for symptom in log.symptoms:
+            symptom_cycle_days.setdefault(symptom, []).append(log.cycle_day)
+    symptom_ranges = {
+        symptom: {"min_cycle_day": min(days), "max_cycle_day": max(days)}
+        for symptom, days in symptom_cycle_days.items()
+    }
+    return symptoms_by_cycle_day, symptom_ranges
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark SymptomReportView's aggregation against the old Python loops on a user with years "
+        "of daily symptom logs (seeded in a transaction that is rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--years", type=int, default=5, help="Years of daily logs to seed")
+        parser.add_argument("--runs", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options["years"])
+
+            old = self.measure(legacy_report, user, options["runs"])
+            new = self.measure(build_symptom_report, user, options["runs"])
+            matches = self.normalize(legacy_report(user)) == self.normalize(build_symptom_report(user))
+
+            transaction.set_rollback(True)  # Never keep the seeded rows
+
+        self.stdout.write(f"Backend: {connection.vendor}, {options['years'] * 365} daily logs")
+        self.report("old python loops", old)
+        self.report("new aggregation", new)
+        if not matches:
+            self.stderr.write(self.style.ERROR("The reports differ!"))
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS(
+            f"Reports match. Mean speedup: {statistics.mean(old) / statistics.mean(new):.1f}x"
+        ))
+
+    def seed(self, years):
+        stamp = timezone.now().strftime("%Y%m%d%H%M%S%f")
+        user = CustomUser.objects.create(username=f"bench-{stamp}", email=f"bench-{stamp}@example.com")
+        first_day = date.today() - timedelta(days=years * 365)
+        SymptomLog.objects.bulk_create(
+            [
+                SymptomLog(
+                    user=user,
+                    date=first_day + timedelta(days=i),
+                    cycle_day=i % 28 + 1,
+                    symptoms=random.sample(SYMPTOMS, random.randint(1, 6)),
+                )
+                for i in range(years * 365)
+            ],
+            batch_size=1000,
+        )
+        return user
+
+    def measure(self, build, user, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            build(user)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def normalize(self, report):
+        by_day, ranges = report
+        return {day: sorted(symptoms) for day, symptoms in by_day.items()}, ranges
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f"{label:>18}: mean {statistics.mean(timings):.1f} ms, "
+            f"min {min(timings):.1f} ms, max {max(timings):.1f} ms"
+        )
@@ -0,0 +1,110 @@
+import statistics
+import time
+
+import grpc
+from django.core.management.base import BaseCommand
+from google.cloud import dialogflow_v2 as dialogflow
+from google.cloud.dialogflow_v2.services.sessions.transports import SessionsGrpcTransport
+
+from users.dialogflow_pool import KEEPALIVE_OPTIONS, SessionsClientPool
+from users.management.commands.bench_dialogflow_pool import start_stand_in_server
+from users.resilience import CircuitBreaker, CircuitOpenError, Deadline, DeadlineExpired
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a local fake Dialogflow through healthy, slow, failing and recovered phases and check "
+        "that the circuit breaker and deadlines keep call latency bounded"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=40, help="Calls per phase")
+        parser.add_argument("--timeout", type=float, default=0.2, help="Per-call provider timeout (s)")
+        parser.add_argument("--deadline", type=float, default=0.5, help="End-to-end request deadline (s)")
+        parser.add_argument("--failure-threshold", type=int, default=5)
+        parser.add_argument("--reset-timeout", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        faults = {}
+        server, address = start_stand_in_server(faults)
+
+        def factory():
+            channel = grpc.insecure_channel(address, options=KEEPALIVE_OPTIONS)
+            return dialogflow.SessionsClient(transport=SessionsGrpcTransport(channel=channel))
+
+        pool = SessionsClientPool(factory, size=2)
+        breaker = CircuitBreaker(
+            "dialogflow-drill",
+            failure_threshold=options["failure_threshold"],
+            reset_timeout=options["reset_timeout"],
+        )
+        phases = [
+            ("healthy", {}),
+            ("slow", {"latency_ms": options["timeout"] * 3000}),
+            ("failing", {"error_rate": 1.0}),
+            ("recovered", {}),
+        ]
+
+        failed_checks = []
+        try:
+            for name, phase_faults in phases:
+                faults.clear()
+                faults.update(phase_faults)
+                if name == "failing":
+                    breaker.reset()  # Still open from the slow phase; the errors must reach the provider
+                if name == "recovered":
+                    time.sleep(options["reset_timeout"])  # Let the breaker admit its probe
+                outcomes, timings = self.run_phase(pool, breaker, options)
+                self.report(name, outcomes, timings, breaker)
+
+                slowest = max(timings)
+                if slowest > options["deadline"] + 0.1:
+                    failed_checks.append(f"{name}: a call took {slowest:.2f}s, past the deadline")
+                if name in ("slow", "failing") and not outcomes["short_circuited"]:
+                    failed_checks.append(f"{name}: the breaker never opened")
+                if name == "failing" and outcomes["failed"] != options["failure_threshold"]:
+                    failed_checks.append(
+                        f"failing: expected {options['failure_threshold']} provider errors before the breaker "
+                        f"opened, got {outcomes['failed']}"
+                    )
+                if name == "recovered" and breaker.state != CircuitBreaker.CLOSED:
+                    failed_checks.append("recovered: the breaker did not close again")
+        finally:
+            pool.close()
+            server.stop(None)
+
+        if failed_checks:
+            for check in failed_checks:
+                self.stderr.write(self.style.ERROR(check))
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS(f"All phases passed ({breaker.trips} breaker trips)."))
+
+    def run_phase(self, pool, breaker, options):
+        request = {
+            "session": dialogflow.SessionsClient.session_path("drill-project", "drill-session"),
+            "query_input": dialogflow.QueryInput(text=dialogflow.TextInput(text="hello", language_code="en")),
+        }
+        outcomes = {"ok": 0, "failed": 0, "short_circuited": 0}
+        timings = []
+        for _ in range(options["calls"]):
+            deadline = Deadline(options["deadline"])
+            started = time.perf_counter()
+            try:
+                timeout = deadline.timeout(options["timeout"])
+                breaker.call(lambda: pool.detect_intent(request, retries=0, timeout=timeout, retry=None))
+                outcomes["ok"] += 1
+            except (CircuitOpenError, DeadlineExpired):
+                outcomes["short_circuited"] += 1  # The chat view answers with a degraded reply here
+            except Exception:
+                outcomes["failed"] += 1
+            timings.append(time.perf_counter() - started)
+        return outcomes, timings
+
+    def report(self, name, outcomes, timings, breaker):
+        timings = sorted(timings)
+        p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+        self.stdout.write(
+            f"{name:>10}: {outcomes['ok']} ok, {outcomes['failed']} failed, "
+            f"{outcomes['short_circuited']} short-circuited | p50 {statistics.median(timings) * 1000:.1f} ms, "
+            f"p95 {p95 * 1000:.1f} ms | breaker {breaker.state}, {breaker.trips} trips"
+        )
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from users.models import ChatSession, CustomUser, Message
+
+
+class Command(BaseCommand):
+    help = (
+        "Enforce chat retention for all users: keep each user's newest --keep chat sessions and "
+        "delete the rest with their messages, in small batches. Meant to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep", type=int, default=10, help="Chat sessions to keep per user")
+        parser.add_argument("--user-batch", type=int, default=500, help="Users examined per chunk")
+        parser.add_argument("--message-batch", type=int, default=5000, help="Messages deleted per statement")
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between delete statements")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = {"users": 0, "sessions": 0, "messages": 0}
+        last_user_id = 0
+
+        while True:
+            # Walk users in primary-key order so each chunk touches a bounded set of rows.
+            user_ids = list(
+                CustomUser.objects.filter(id__gt=last_user_id)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["user_batch"]]
+            )
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+            totals["users"] += len(user_ids)
+
+            expired = self.expired_session_ids(user_ids, options["keep"])
+            if expired:
+                if options["dry_run"]:
+                    totals["messages"] += Message.objects.filter(chat_id__in=expired).count()
+                else:
+                    totals["messages"] += self.delete_messages(expired, options["message_batch"], options["sleep"])
+                    ChatSession.objects.filter(id__in=expired).delete()
+                totals["sessions"] += len(expired)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"users<= {last_user_id}: {totals['users']} users scanned, {totals['sessions']} sessions "
+                f"and {totals['messages']} messages {'to delete' if options['dry_run'] else 'deleted'} "
+                f"({elapsed:.1f}s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Chat retention done: {totals['sessions']} sessions, {totals['messages']} messages "
+            f"{'would be deleted' if options['dry_run'] else 'deleted'}."
+        ))
+
+    def expired_session_ids(self, user_ids, keep):
+        """Sessions ranked below each user's newest `keep`, found with one ROW_NUMBER() query."""
+        ranked = ChatSession.objects.filter(user_id__in=user_ids).annotate(
+            rank=Window(
+                expression=RowNumber(),
+                partition_by=[F("user_id")],
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        return list(ranked.filter(rank__gt=keep).values_list("id", flat=True))
+
+    def delete_messages(self, chat_ids, batch_size, pause):
+        """Deletes messages in id batches so each statement holds its locks only briefly."""
+        deleted = 0
+        while True:
+            ids = list(Message.objects.filter(chat_id__in=chat_ids).values_list("id", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            # Message has no dependents, so this is a single DELETE ... WHERE id IN (...).
+            deleted += Message.objects.filter(id__in=ids).delete()[0]
+            if pause:
+                time.sleep(pause)
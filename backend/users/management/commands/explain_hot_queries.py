@@ -0,0 +1,159 @@
+import random
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from users.models import ChatSession, CustomUser, MenstrualData, Message, SymptomLog
+from users.symptoms import filter_by_symptom, sync_log_symptoms
+
+# indexes: the plan must read through one of them. ordered: the query takes the first
+# rows in index order (a LIMIT), so sorting would mean reading every one of the user's rows
+HotQuery = namedtuple("HotQuery", ["name", "queryset", "indexes", "ordered"])
+
+# Plan fragments that mean the rows were sorted after being read, instead of
+# coming out of the index already in order
+SORT_MARKERS = ("USE TEMP B-TREE FOR ORDER BY", "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY", "Sort ")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed sample data in a transaction that is rolled back, EXPLAIN the hot per-user queries and "
+        "fail if any of them no longer uses its composite index (or has to sort). Run it in CI after migrate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200, help="Users to seed")
+        parser.add_argument("--rows", type=int, default=30, help="Periods, symptom logs and chats per user")
+        parser.add_argument("--show-plans", action="store_true", help="Print every query plan")
+
+    def handle(self, *args, **options):
+        failed_checks = []
+        with transaction.atomic():
+            user, chat = self.seed(options["users"], options["rows"])
+            self.prepare_planner()
+
+            for query in self.hot_queries(user, chat):
+                plan = query.queryset.explain()
+                problems = []
+                if not any(index in plan for index in query.indexes):
+                    problems.append(f"does not use {' or '.join(query.indexes)}")
+                if query.ordered and any(marker in plan for marker in SORT_MARKERS):
+                    problems.append("sorts instead of reading in index order")
+
+                if problems:
+                    failed_checks.append(f"{query.name}: {', '.join(problems)}")
+                    self.stdout.write(self.style.ERROR(f"FAIL {query.name}: {', '.join(problems)}"))
+                else:
+                    self.stdout.write(f"ok   {query.name} ({next(index for index in query.indexes if index in plan)})")
+                if problems or options["show_plans"]:
+                    self.stdout.write("     " + plan.replace("\n", "\n     "))
+
+            transaction.set_rollback(True)  # Never keep the seeded rows
+
+        if failed_checks:
+            for check in failed_checks:
+                self.stderr.write(self.style.ERROR(check))
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS("All hot queries use their indexes."))
+
+    def seed(self, user_count, rows):
+        stamp = timezone.now().strftime("%Y%m%d%H%M%S%f")
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f"explain-{stamp}-{i}", email=f"explain-{stamp}-{i}@example.com")
+            for i in range(user_count)
+        ])
+        if not users[0].pk:  # Backends without RETURNING on bulk inserts
+            users = list(CustomUser.objects.filter(username__startswith=f"explain-{stamp}-"))
+
+        # Rows go in in time order across all users, as they arrive in production, so
+        # each user's rows are spread over the table rather than stored together
+        periods, logs, chats = [], [], []
+        starts = {user: date(2020, 1, 1) + timedelta(days=random.randint(0, 27)) for user in users}
+        for i in range(rows):
+            for user in users:
+                start = starts[user]
+                periods.append(MenstrualData(
+                    user=user, start_date=start, end_date=start + timedelta(days=4), cycle_length=28, period_length=5
+                ))
+                logs.append(SymptomLog(
+                    user=user, date=start + timedelta(days=i % 5), cycle_day=i % 5 + 1,
+                    symptoms=["Cramps", "Fatigue", "Headache", "Bloating"][: i % 4 + 1],
+                ))
+                chats.append(ChatSession(user=user, session_id=f"explain-{stamp}-{user.pk}-{i}"))
+                starts[user] = start + timedelta(days=random.randint(24, 33))
+        MenstrualData.objects.bulk_create(periods, batch_size=1000)
+        SymptomLog.objects.bulk_create(logs, batch_size=1000)
+        sync_log_symptoms(SymptomLog.objects.filter(user__in=users))
+        ChatSession.objects.bulk_create(chats, batch_size=1000)
+
+        chat_ids = ChatSession.objects.filter(user__in=users).values_list("id", flat=True)
+        Message.objects.bulk_create(
+            [Message(chat_id=chat_id, sender="user", text="hello") for chat_id in chat_ids for _ in range(5)],
+            batch_size=1000,
+        )
+        user = users[0]
+        chat = ChatSession.objects.filter(user=user).first()
+        Message.objects.bulk_create(
+            [Message(chat=chat, sender="user", text="hello") for _ in range(rows * 50)], batch_size=1000
+        )
+        return user, chat
+
+    def prepare_planner(self):
+        # Fresh statistics, so the plans are the ones the planner picks on cost for
+        # tables of this size; no planner settings are forced
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def hot_queries(self, user, chat):
+        today = date(2021, 6, 1)
+        # A sync point just before the chat's last few messages
+        since = (
+            Message.objects.filter(chat=chat).order_by("-timestamp", "-id").values_list("timestamp", flat=True)[5]
+        )
+        return [
+            HotQuery(
+                "period listing (MenstrualDataView.get)",
+                MenstrualData.objects.filter(user=user).order_by("start_date"),
+                ("menstrual_user_start_idx",), False,
+            ),
+            HotQuery(
+                "previous period (MenstrualDataView.post)",
+                MenstrualData.objects.filter(user=user).order_by("-start_date")[:1],
+                ("menstrual_user_start_idx",), True,
+            ),
+            HotQuery(
+                "period on or before a date (SymptomLogView.post)",
+                MenstrualData.objects.filter(user=user, start_date__lte=today).order_by("-start_date")[:1],
+                ("menstrual_user_start_idx",), True,
+            ),
+            HotQuery(
+                "symptom logs by cycle day (SymptomReportView)",
+                SymptomLog.objects.filter(user=user, cycle_day__isnull=False).order_by("cycle_day"),
+                # A bitmap scan of either user-leading index and a sort of the user's logs
+                # can beat reading them in cycle-day order
+                ("symptomlog_user_cycleday_idx", "users_symptomlog_user_id_date_"), False,
+            ),
+            HotQuery(
+                "symptom logs with a symptom (SymptomLogView.get ?symptom=)",
+                filter_by_symptom(SymptomLog.objects.filter(user=user), user, "Cramps"),
+                ("logsymptom_user_symptom_idx",), False,
+            ),
+            HotQuery(
+                "chat sessions page (get_chat_history)",
+                ChatSession.objects.filter(user=user).order_by("-created_at", "-id")[:10],
+                ("chatsession_user_created_idx",), True,
+            ),
+            HotQuery(
+                "session messages page (get_chat_history)",
+                Message.objects.filter(chat=chat).order_by("-timestamp", "-id")[:50],
+                ("message_chat_timestamp_idx",), True,
+            ),
+            HotQuery(
+                "messages since a sync point (get_chat_history)",
+                Message.objects.filter(chat=chat, timestamp__gt=since),
+                ("message_chat_timestamp_idx",), False,
+            ),
+        ]
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.forecasting import BATCH_ROWS, FORECAST_HORIZON, run_forecasts
+
+
+class Command(BaseCommand):
+    help = (
+        "Forecast the next cycles (period and fertile window) for every user in one streamed pass "
+        "and store them in CycleForecast. Meant to run nightly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horizon", type=int, default=FORECAST_HORIZON, help="Cycles to forecast per user")
+        parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="Periods processed per batch")
+        parser.add_argument("--user", type=int, action="append", dest="user_ids", help="Only forecast this user id")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = {"users": 0, "periods": 0, "forecasts": 0}
+
+        for users, periods, forecasts in run_forecasts(
+            horizon=options["horizon"], batch_rows=options["batch_rows"], user_ids=options["user_ids"]
+        ):
+            totals["users"] += users
+            totals["periods"] += periods
+            totals["forecasts"] += forecasts
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{totals['users']} users, {totals['periods']} periods, {totals['forecasts']} forecasts "
+                f"({elapsed:.1f}s, {totals['users'] / elapsed:.0f} users/s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Forecast {options['horizon']} cycles for {totals['users']} users "
+            f"in {time.monotonic() - started:.1f}s."
+        ))
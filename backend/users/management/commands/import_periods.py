@@ -0,0 +1,44 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from users.models import CustomUser
+from users.period_import import PeriodImportError, import_periods, parse_periods
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a user's period history from a CSV (start_date,end_date[,period_length]) or JSON file. "
+        "Periods already logged on the same start date are updated, so re-running is safe."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", help="Username, email or id of the user to import for")
+        parser.add_argument("path", help="CSV or JSON file to import")
+        parser.add_argument("--format", choices=["csv", "json"], help="Defaults to the file extension")
+
+    def handle(self, *args, **options):
+        lookup = options["user"]
+        user_filter = Q(username=lookup) | Q(email=lookup)
+        if lookup.isdigit():
+            user_filter |= Q(pk=int(lookup))
+        user = CustomUser.objects.filter(user_filter).first()
+        if user is None:
+            raise CommandError(f"User '{lookup}' not found.")
+
+        fmt = options["format"] or os.path.splitext(options["path"])[1].lstrip(".").lower()
+        try:
+            with open(options["path"], encoding="utf-8-sig") as f:
+                periods = parse_periods(f.read(), fmt)
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        except PeriodImportError as e:
+            raise CommandError(str(e))
+
+        result = import_periods(user, periods)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(periods)} periods for {user.username}: {result['created']} created, "
+            f"{result['updated']} updated, {result['unchanged']} unchanged, "
+            f"{result['merged']} duplicate rows merged."
+        ))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.cycle_days import recompute_cycle_days
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Reassign SymptomLog.cycle_day for every user from their current period history, fixing logs "
+        "written before a period was added, imported or deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-batch", type=int, default=1000, help="Users recomputed per transaction")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        users = fixed = 0
+        last_user_id = 0
+
+        while True:
+            user_ids = list(
+                CustomUser.objects.filter(id__gt=last_user_id)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["user_batch"]]
+            )
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+            users += len(user_ids)
+
+            with transaction.atomic():
+                fixed += recompute_cycle_days(user_ids)
+
+            self.stdout.write(
+                f"users<= {last_user_id}: {fixed} logs fixed ({time.monotonic() - started:.1f}s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Cycle days recomputed for {users} users: {fixed} logs changed."))
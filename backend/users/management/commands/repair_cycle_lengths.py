@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import Lag
+
+from users.cycles import DEFAULT_CYCLE_LENGTH
+from users.models import CustomUser, CycleStats, MenstrualData
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every stored MenstrualData.cycle_length (days since the user's previous period started, "
+        f"{DEFAULT_CYCLE_LENGTH} for the first) with a LAG() window query, fixing rows that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-batch", type=int, default=1000, help="Users repaired per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would change")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = {"users": 0, "periods": 0, "fixed": 0}
+        last_user_id = 0
+
+        while True:
+            user_ids = list(
+                CustomUser.objects.filter(id__gt=last_user_id)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["user_batch"]]
+            )
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+            totals["users"] += len(user_ids)
+
+            with transaction.atomic():
+                periods, fixed = self.repair(user_ids, options["dry_run"])
+            totals["periods"] += periods
+            totals["fixed"] += fixed
+
+            self.stdout.write(
+                f"users<= {last_user_id}: {totals['periods']} periods checked, {totals['fixed']} "
+                f"{'to fix' if options['dry_run'] else 'fixed'} ({time.monotonic() - started:.1f}s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Cycle lengths {'checked' if options['dry_run'] else 'repaired'}: {totals['fixed']} of "
+            f"{totals['periods']} periods {'would change' if options['dry_run'] else 'changed'}."
+        ))
+
+    def repair(self, user_ids, dry_run):
+        rows = (
+            MenstrualData.objects.filter(user_id__in=user_ids)
+            .annotate(previous_start=Window(
+                expression=Lag("start_date"),
+                partition_by=[F("user_id")],
+                order_by=[F("start_date").asc(), F("id").asc()],
+            ))
+            .order_by("user_id", "start_date", "id")
+            .values_list("id", "user_id", "start_date", "previous_start", "cycle_length")
+        )
+
+        fixes, changed_users = [], set()
+        checked, expected = 0, None
+        for period_id, user_id, start_date, previous_start, cycle_length in rows.iterator(chunk_size=5000):
+            checked += 1
+            if previous_start is None:
+                expected = DEFAULT_CYCLE_LENGTH
+            elif previous_start != start_date:
+                expected = (start_date - previous_start).days
+            # Periods logged twice on one date share the cycle length of the first
+            if cycle_length != expected:
+                fixes.append(MenstrualData(id=period_id, cycle_length=expected))
+                changed_users.add(user_id)
+
+        if fixes and not dry_run:
+            MenstrualData.objects.bulk_update(fixes, ["cycle_length"], batch_size=1000)
+            # Cached period listings show cycle_length, so their ETags must change
+            CycleStats.objects.filter(pk__in=changed_users).update(periods_version=F("periods_version") + 1)
+        return checked, len(fixes)
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.17 on 2026-10-18 18:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0013_customuser_avatar_url"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CycleStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="cycle_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("period_count", models.PositiveIntegerField(default=0)),
+                ("period_length_sum", models.PositiveIntegerField(default=0)),
+                ("first_start_date", models.DateField(blank=True, null=True)),
+                ("last_start_date", models.DateField(blank=True, null=True)),
+                ("last_end_date", models.DateField(blank=True, null=True)),
+                ("avg_cycle_length", models.IntegerField(blank=True, null=True)),
+                ("avg_period_length", models.IntegerField(blank=True, null=True)),
+                ("next_period_start", models.DateField(blank=True, null=True)),
+                ("next_period_end", models.DateField(blank=True, null=True)),
+                ("fertile_window_start", models.DateField(blank=True, null=True)),
+                ("fertile_window_end", models.DateField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.17 on 2026-10-18 18:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0014_cyclestats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CycleForecast",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sequence", models.PositiveSmallIntegerField()),
+                ("period_start", models.DateField()),
+                ("period_end", models.DateField()),
+                ("fertile_window_start", models.DateField()),
+                ("fertile_window_end", models.DateField()),
+                ("avg_cycle_length", models.IntegerField()),
+                ("cycle_length_std", models.FloatField(blank=True, null=True)),
+                ("generated_at", models.DateTimeField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cycle_forecasts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["period_start"], name="users_cycle_period__93f890_idx"
+                    )
+                ],
+                "unique_together": {("user", "sequence")},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.17 on 2026-10-18 18:12
+
+from django.contrib.postgres import operations
+from django.db import migrations, models
+
+
+class AddIndexConcurrently(operations.AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL, so building these indexes on the
+    large chat and tracker tables does not block writes; a plain CREATE INDEX
+    elsewhere (SQLite in development).
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+
+    dependencies = [
+        ("users", "0015_cycleforecast"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="chatsession",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="chatsession_user_created_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="menstrualdata",
+            index=models.Index(
+                fields=["user", "start_date"], name="menstrual_user_start_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(
+                fields=["chat", "timestamp", "id"], name="message_chat_timestamp_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="symptomlog",
+            index=models.Index(
+                fields=["user", "cycle_day"], name="symptomlog_user_cycleday_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.17 on 2026-10-18 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0016_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cyclestats",
+            name="periods_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="cyclestats",
+            name="symptoms_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.17 on 2026-10-18 18:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0017_tracker_versions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Symptom",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SymptomLogSymptom",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "log",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="symptom_entries",
+                        to="users.symptomlog",
+                    ),
+                ),
+                (
+                    "symptom",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="users.symptom",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="symptomlog",
+            name="symptom_terms",
+            field=models.ManyToManyField(
+                related_name="logs",
+                through="users.SymptomLogSymptom",
+                to="users.symptom",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="symptomlogsymptom",
+            index=models.Index(
+                fields=["user", "symptom", "date"], name="logsymptom_user_symptom_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="symptomlogsymptom",
+            unique_together={("log", "symptom")},
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def intern_symptoms(apps, schema_editor):
+    """Fills the Symptom vocabulary and the per-log symptom rows from the existing JSON lists."""
+    Symptom = apps.get_model("users", "Symptom")
+    SymptomLog = apps.get_model("users", "SymptomLog")
+    SymptomLogSymptom = apps.get_model("users", "SymptomLogSymptom")
+    max_length = Symptom._meta.get_field("name").max_length
+
+    ids = dict(Symptom.objects.values_list("name", "id"))
+    last_id = 0
+    while True:
+        logs = list(
+            SymptomLog.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "user_id", "date", "symptoms")[:BATCH_SIZE]
+        )
+        if not logs:
+            break
+        last_id = logs[-1][0]
+
+        names_by_log = {}
+        for log_id, _, _, symptoms in logs:
+            if isinstance(symptoms, list):
+                names_by_log[log_id] = {
+                    name for name in symptoms
+                    if isinstance(name, str) and name and len(name) <= max_length
+                }
+        new_names = set().union(*names_by_log.values()) - ids.keys()
+        if new_names:
+            Symptom.objects.bulk_create([Symptom(name=name) for name in new_names], ignore_conflicts=True)
+            ids.update(Symptom.objects.filter(name__in=new_names).values_list("name", "id"))
+
+        SymptomLogSymptom.objects.bulk_create(
+            [
+                SymptomLogSymptom(log_id=log_id, symptom_id=ids[name], user_id=user_id, date=log_date)
+                for log_id, user_id, log_date, _ in logs
+                for name in names_by_log.get(log_id, ())
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0018_symptom_vocabulary"),
+    ]
+
+    operations = [
+        migrations.RunPython(intern_symptoms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.17 on 2026-10-18 18:26
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Title matches rank above keyword matches, which rank above body matches.
+# Keep in sync with users.article_search.SEARCH_CONFIG.
+CREATE_SEARCH_SQL = """
+CREATE FUNCTION users_article_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.keywords, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_article_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, keywords, content ON users_article
+FOR EACH ROW EXECUTE FUNCTION users_article_search_vector_update();
+
+UPDATE users_article SET title = title;
+
+CREATE INDEX users_article_search_vector_idx ON users_article USING gin (search_vector);
+"""
+
+DROP_SEARCH_SQL = """
+DROP INDEX IF EXISTS users_article_search_vector_idx;
+DROP TRIGGER IF EXISTS users_article_search_vector_trigger ON users_article;
+DROP FUNCTION IF EXISTS users_article_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    # SQLite in development searches with icontains instead (see users.article_search)
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_SEARCH_SQL)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_SQL)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0019_intern_symptoms"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="article",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-18 18:36
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0020_article_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="client_id",
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="timestamp",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.17 on 2026-10-18 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class DropForeignKeyIndexConcurrently(migrations.AlterField):
+    """
+    Sets db_index=False on a foreign key whose column already leads a composite
+    index. On PostgreSQL only the single-column index is dropped, CONCURRENTLY;
+    a plain AlterField would also drop and re-validate the foreign key, locking
+    the table while it scans every row. A plain AlterField elsewhere.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            table, column, index = self.index(app_label, schema_editor, from_state)
+            schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+        else:
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            table, column, index = self.index(app_label, schema_editor, to_state)
+            schema_editor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {table} ({column})")
+        else:
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def index(self, app_label, schema_editor, state):
+        """The quoted table, column and index name Django gave the foreign key's index."""
+        model = state.apps.get_model(app_label, self.model_name)
+        table, column = model._meta.db_table, model._meta.get_field(self.name).column
+        index = schema_editor._create_index_name(table, [column])
+        return tuple(schema_editor.quote_name(name) for name in (table, column, index))
+
+
+class Migration(migrations.Migration):
+    atomic = False  # DROP INDEX CONCURRENTLY cannot run inside a transaction
+
+    dependencies = [
+        ("users", "0021_message_client_id"),
+    ]
+
+    operations = [
+        DropForeignKeyIndexConcurrently(
+            model_name="chatsession",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        DropForeignKeyIndexConcurrently(
+            model_name="menstrualdata",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        DropForeignKeyIndexConcurrently(
+            model_name="symptomlog",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
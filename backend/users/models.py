@@ -3,6 +3,8 @@ from django.db import models
 from django.db.models import Count
 from django.contrib.auth.models import User 
 from django.conf import settings
+from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
 from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
 
 class CustomUser(AbstractUser):
@@ -29,8 +31,8 @@ class CustomUser(AbstractUser):
 
 
 class MenstrualData(models.Model):
-    # Use CustomUser directly
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    # Use CustomUser directly. Covered by menstrual_user_start_idx, which leads with user
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)
     start_date = models.DateField()
     end_date = models.DateField()
     cycle_length = models.IntegerField(default=28)
@@ -39,12 +41,81 @@ class MenstrualData(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.start_date} to {self.end_date}"
 
+    class Meta:
+        indexes = [
+            # A user's periods by date: listings, latest/previous period, start_date__lte lookups
+            models.Index(fields=["user", "start_date"], name="menstrual_user_start_idx"),
+        ]
+
+
+class CycleStats(models.Model):
+    """
+    Running per-user totals behind period predictions, kept up to date by the
+    period views so a prediction is a single primary-key read. Also holds the
+    version stamps used for conditional GETs.
+    """
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="cycle_stats")
+    period_count = models.PositiveIntegerField(default=0)
+    period_length_sum = models.PositiveIntegerField(default=0)
+    first_start_date = models.DateField(null=True, blank=True)
+    last_start_date = models.DateField(null=True, blank=True)
+    last_end_date = models.DateField(null=True, blank=True)
+
+    # Current prediction, derived from the totals above
+    avg_cycle_length = models.IntegerField(null=True, blank=True)
+    avg_period_length = models.IntegerField(null=True, blank=True)
+    next_period_start = models.DateField(null=True, blank=True)
+    next_period_end = models.DateField(null=True, blank=True)
+    fertile_window_start = models.DateField(null=True, blank=True)
+    fertile_window_end = models.DateField(null=True, blank=True)
+
+    # Bumped on every write to the user's periods / symptom logs; the tracker
+    # read endpoints derive their ETags from these
+    periods_version = models.PositiveIntegerField(default=0)
+    symptoms_version = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.period_count} periods"
+
+
+class CycleForecast(models.Model):
+    """One upcoming cycle for a user, written in bulk by the forecast_cycles command."""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="cycle_forecasts")
+    sequence = models.PositiveSmallIntegerField()  # 1 = the next period
+    period_start = models.DateField()
+    period_end = models.DateField()
+    fertile_window_start = models.DateField()
+    fertile_window_end = models.DateField()
+    avg_cycle_length = models.IntegerField()
+    cycle_length_std = models.FloatField(null=True, blank=True)  # None until the user has two cycles
+    generated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user.username} - cycle +{self.sequence} on {self.period_start}"
+
+    class Meta:
+        unique_together = ('user', 'sequence')
+        indexes = [models.Index(fields=["period_start"])]  # Reminders look up upcoming periods by date
+
+
+class Symptom(models.Model):
+    """Vocabulary of symptom names; each distinct name is stored once and logs refer to it by id."""
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
 
 class SymptomLog(models.Model):
-    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    # Covered by the (user, date) unique index and symptomlog_user_cycleday_idx
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False)
     date = models.DateField()  # Date when symptoms were logged
     cycle_day = models.IntegerField(null=True, blank=True)  # Cycle Day (e.g., Day 1, Day 5)
     symptoms = models.JSONField()  # Store symptoms as a list (e.g., ["Cramps", "Fatigue"])
+    # Indexed copy of `symptoms`, kept in sync by users.symptoms
+    symptom_terms = models.ManyToManyField(Symptom, through="SymptomLogSymptom", related_name="logs")
     
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -53,15 +124,40 @@ class SymptomLog(models.Model):
     
     class Meta:
         unique_together = ('user', 'date')
+        indexes = [
+            models.Index(fields=["user", "cycle_day"], name="symptomlog_user_cycleday_idx"),
+        ]
+
+
+class SymptomLogSymptom(models.Model):
+    """One symptom on one log. user and date are copied from the log so "which days had X" is an index range scan."""
+    log = models.ForeignKey(SymptomLog, on_delete=models.CASCADE, related_name="symptom_entries")
+    symptom = models.ForeignKey(Symptom, on_delete=models.PROTECT, related_name="+")
+    # Covered by logsymptom_user_symptom_idx, which leads with user
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="+", db_index=False)
+    date = models.DateField()
+
+    class Meta:
+        unique_together = ('log', 'symptom')
+        indexes = [
+            models.Index(fields=["user", "symptom", "date"], name="logsymptom_user_symptom_idx"),
+        ]
     
 class ChatSession(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)  # ✅ FIXED: Use dynamic user model
+    # ✅ FIXED: Use dynamic user model. Covered by chatsession_user_created_idx, which leads with user
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
     session_id = models.CharField(max_length=255, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Chat {self.session_id} ({self.user.username})"
 
+    class Meta:
+        indexes = [
+            # Chat history pages sessions newest first, with id as the keyset tie-breaker
+            models.Index(fields=["user", "created_at", "id"], name="chatsession_user_created_idx"),
+        ]
+
     @staticmethod
     def cleanup_old_sessions(user):
         """Keeps only the last 10 chat sessions per user."""
@@ -75,10 +171,18 @@ class Message(models.Model):
     chat = models.ForeignKey(ChatSession, on_delete=models.CASCADE, related_name="messages")
     sender = models.CharField(max_length=10, choices=[("user", "User"), ("bot", "Bot")])
     text = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the message is queued (users.chat_buffer), not when the row is written
+    timestamp = models.DateTimeField(default=timezone.now)
+    # Assigned at queue time so clients can match a buffered message to its row once written
+    client_id = models.UUIDField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.sender} - {self.text[:50]}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["chat", "timestamp", "id"], name="message_chat_timestamp_idx"),
+        ]
     
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -96,6 +200,9 @@ class Article(models.Model):
     published_date = models.DateTimeField()
     keywords = models.TextField(help_text="Keywords matched", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Weighted title/keywords/content tsvector, maintained by a PostgreSQL trigger
+    # and GIN-indexed (migration 0020); unused on other databases
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.title
@@ -0,0 +1,149 @@
+"""
+Bulk import of period history, e.g. from another tracker's CSV or JSON export.
+
+Imported periods are merged with the user's existing ones into a single
+timeline sorted by start date. Every cycle length is computed in one pass over
+that timeline, and all rows are written with bulk_create/bulk_update in one
+transaction. Periods are matched on (user, start_date), so importing the same
+file twice changes nothing.
+
+A file that lists the same start date twice is rejected. Rows already stored
+twice for one start date are merged into the first one logged, since only one
+of them can match. Imports hold the same CycleStats lock as every other period
+write in users.cycles.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from django.db import transaction
+
+from .cycle_days import recompute_cycle_days
+from .cycles import DEFAULT_CYCLE_LENGTH, _locked_stats, rebuild_cycle_stats
+from .models import MenstrualData
+
+MAX_IMPORT_PERIODS = 10000
+
+
+class PeriodImportError(ValueError):
+    pass
+
+
+def parse_periods(content, fmt):
+    """
+    Parses CSV (header row with start_date, end_date and optionally
+    period_length) or JSON (a list of such objects, or {"periods": [...]})
+    into period dicts. Raises PeriodImportError on bad input.
+    """
+    if fmt == "csv":
+        records = list(csv.DictReader(io.StringIO(content)))
+    elif fmt == "json":
+        try:
+            records = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise PeriodImportError(f"Invalid JSON: {e}")
+    else:
+        raise PeriodImportError(f"Unsupported format '{fmt}'. Use csv or json.")
+    return clean_periods(records)
+
+
+def clean_periods(records):
+    """Validates period records (dicts with YYYY-MM-DD dates) like MenstrualDataView.post does."""
+    if isinstance(records, dict):
+        records = records.get("periods")
+    if not isinstance(records, list):
+        raise PeriodImportError("Expected a list of periods.")
+    if len(records) > MAX_IMPORT_PERIODS:
+        raise PeriodImportError(f"At most {MAX_IMPORT_PERIODS} periods can be imported at once.")
+
+    periods = []
+    numbers_by_start = {}
+    for number, record in enumerate(records, start=1):
+        if not isinstance(record, dict) or not record.get("start_date") or not record.get("end_date"):
+            raise PeriodImportError(f"Period {number}: start_date and end_date are required.")
+        try:
+            start_date = datetime.strptime(str(record["start_date"]).strip(), "%Y-%m-%d").date()
+            end_date = datetime.strptime(str(record["end_date"]).strip(), "%Y-%m-%d").date()
+        except ValueError:
+            raise PeriodImportError(f"Period {number}: invalid date format. Use YYYY-MM-DD.")
+        if end_date < start_date:
+            raise PeriodImportError(f"Period {number}: end date cannot be before start date.")
+        if start_date in numbers_by_start:
+            raise PeriodImportError(
+                f"Period {number}: start date {start_date} is already used by period {numbers_by_start[start_date]}."
+            )
+        numbers_by_start[start_date] = number
+
+        period_length = record.get("period_length") or (end_date - start_date).days + 1
+        try:
+            period_length = int(period_length)
+            if period_length <= 0:
+                raise ValueError
+        except ValueError:
+            raise PeriodImportError(f"Period {number}: period length must be a positive integer.")
+
+        periods.append({"start_date": start_date, "end_date": end_date, "period_length": period_length})
+    return periods
+
+
+@transaction.atomic
+def import_periods(user, periods):
+    """
+    Merges `periods` (from clean_periods) into the user's history. A period
+    whose start date is already logged replaces that row's end date and length.
+    Returns counts of created, updated, unchanged and merged (duplicate, deleted)
+    rows.
+    """
+    # Serializes this import with other imports and period writes, so no two can create a start date
+    _locked_stats(user.pk)
+
+    existing, duplicates = {}, []
+    for period in MenstrualData.objects.filter(user=user).order_by("start_date", "id"):
+        if period.start_date in existing:
+            duplicates.append(period.pk)
+        else:
+            existing[period.start_date] = period
+    incoming = {period["start_date"]: period for period in periods}
+
+    to_create, to_update = [], []
+    unchanged = 0
+    previous_start = None
+    for start_date in sorted(existing.keys() | incoming.keys()):
+        # Same rule as MenstrualDataView.post: days since the previous start, 28 for the first
+        cycle_length = (start_date - previous_start).days if previous_start else DEFAULT_CYCLE_LENGTH
+        previous_start = start_date
+
+        row = existing.get(start_date)
+        values = incoming.get(start_date)
+        if row is None:
+            to_create.append(MenstrualData(user=user, cycle_length=cycle_length, **values))
+            continue
+
+        changed = row.cycle_length != cycle_length
+        row.cycle_length = cycle_length
+        if values and (row.end_date, row.period_length) != (values["end_date"], values["period_length"]):
+            row.end_date = values["end_date"]
+            row.period_length = values["period_length"]
+            changed = True
+        if changed:
+            to_update.append(row)
+        else:
+            unchanged += 1
+
+    # The kept row already has the start date, so dropping its duplicates moves no cycle days
+    MenstrualData.objects.filter(pk__in=duplicates).delete()
+    MenstrualData.objects.bulk_create(to_create, batch_size=1000)
+    MenstrualData.objects.bulk_update(to_update, ["end_date", "period_length", "cycle_length"], batch_size=1000)
+    if to_create or to_update or duplicates:
+        rebuild_cycle_stats(user)
+    if to_create:
+        # Only new start dates move cycle days; every log from the earliest one on may have changed
+        recompute_cycle_days([user.pk], min(period.start_date for period in to_create))
+
+    return {
+        "created": len(to_create),
+        "updated": len(to_update),
+        "unchanged": unchanged,
+        "merged": len(duplicates),
+    }
@@ -0,0 +1,154 @@
+"""
+Circuit breakers and request deadlines for the chatbot's external providers.
+
+When Dialogflow or OpenAI degrades, calls to it fail fast once its breaker
+opens instead of tying up workers, and the chat pipeline answers from the other
+provider or with a local degraded reply. After RESET_TIMEOUT seconds a single
+probe call is let through; if it succeeds the breaker closes again.
+"""
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+
+class DeadlineExpired(Exception):
+    """Raised when a chat request has no time left for another provider call."""
+
+
+class Deadline:
+    """End-to-end time budget for one chat request."""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self, cap=None):
+        """Seconds the next provider call may take: what is left, capped at `cap`."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExpired()
+        return min(remaining, cap) if cap else remaining
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go through now; an expired open breaker admits one probe."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def reset(self):
+        """Closes the breaker and clears its failure count (drills and tests)."""
+        self.record_success()
+
+    def release(self):
+        """
+        Settles a call its caller abandoned (CancelledError or GeneratorExit on a
+        client disconnect). That says nothing about the provider, so no failure is
+        counted; a half-open probe is freed so the next call can probe instead.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def call(self, fn):
+        """Calls fn() through the breaker; any exception counts as a provider failure."""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+        try:
+            result = fn()
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, make_coroutine, timeout=None):
+        """Awaits make_coroutine() through the breaker, cancelling it after `timeout` seconds."""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+        try:
+            result = await asyncio.wait_for(make_coroutine(), timeout)
+        except Exception:  # Including the TimeoutError of a call that ran past `timeout`
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "trips": self.trips,
+                "open_for_seconds": (
+                    round(time.monotonic() - self.opened_at, 1) if self.state != self.CLOSED else None
+                ),
+            }
+
+
+_config = getattr(settings, "CHAT_CIRCUIT_BREAKER", {})
+dialogflow_breaker = CircuitBreaker(
+    "dialogflow",
+    failure_threshold=_config.get("FAILURE_THRESHOLD", 5),
+    reset_timeout=_config.get("RESET_TIMEOUT", 30),
+)
+openai_breaker = CircuitBreaker(
+    "openai",
+    failure_threshold=_config.get("FAILURE_THRESHOLD", 5),
+    reset_timeout=_config.get("RESET_TIMEOUT", 30),
+)
+BREAKERS = {breaker.name: breaker for breaker in (dialogflow_breaker, openai_breaker)}
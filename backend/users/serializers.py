@@ -26,10 +26,13 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class ArticleSerializer(serializers.ModelSerializer):
     categories = CategorySerializer(many=True)
+    # Only present on search results (see users.article_search)
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
 
     class Meta:
         model = Article
-        fields = "__all__"
+        exclude = ["search_vector"]
 
 class ContactSubmissionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,158 @@
+"""
+Symptom analytics: how often each symptom is logged on each cycle day, how
+often symptoms are logged together, and the lift of each pair.
+
+The interned (log, symptom) rows from users.symptoms are streamed in one query
+ordered by log and cut into batches at log boundaries. Each batch becomes a
+logs x symptoms 0/1 matrix X; the co-occurrence counts are the sum of X.T @ X
+over batches and the cycle-day heatmap is accumulated with np.add.at. Only the
+most frequently logged symptoms are included, so the matrices stay small no
+matter how free-form the vocabulary gets.
+
+Per-user results are cached under the user's symptoms version, which every
+symptom write and cycle-day recompute bumps, so a new log invalidates them
+without any explicit delete. Population results are cached for a fixed time.
+
+NumPy is imported on first use rather than at module load, so it stays out of
+every worker's startup (see bench_startup).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import SymptomLog, SymptomLogSymptom
+from .versioning import data_versions
+
+ANALYTICS_SETTINGS = {
+    "TOP_SYMPTOMS": 25,  # Symptoms included in the matrices
+    "MAX_CYCLE_DAY": 45,  # Heatmap columns; logs on later cycle days are left out of it
+    "USER_TTL": 24 * 60 * 60,  # Seconds a user's result is kept; a new log replaces it sooner
+    "POPULATION_TTL": 60 * 60,  # Seconds the population-level result is cached
+    **getattr(settings, "SYMPTOM_ANALYTICS", {}),
+}
+BATCH_ROWS = 50000
+
+
+def _iter_incidence_batches(pairs, batch_rows=BATCH_ROWS):
+    """Yields (log_ids, symptom_ids, cycle_days) arrays, never splitting a log across batches."""
+    batch = []
+    for row in pairs.iterator(chunk_size=batch_rows):
+        if len(batch) >= batch_rows and row[0] != batch[-1][0]:
+            yield _to_arrays(batch)
+            batch = []
+        batch.append(row)
+    if batch:
+        yield _to_arrays(batch)
+
+
+def _to_arrays(batch):
+    import numpy as np
+
+    log_ids, symptom_ids, cycle_days = zip(*batch)
+    cycle_days = [0 if day is None else day for day in cycle_days]  # 0 falls outside the heatmap
+    return np.array(log_ids), np.array(symptom_ids), np.array(cycle_days)
+
+
+def _nullable(matrix, decimals=3):
+    """Rounds a float matrix into JSON-ready lists, with NaN as None."""
+    import numpy as np
+
+    rounded = np.round(matrix, decimals).astype(object)
+    rounded[np.isnan(matrix)] = None
+    return rounded.tolist()
+
+
+def compute_symptom_analytics(user=None):
+    """
+    Builds the analytics for one user's logs, or for every user's when user is
+    None. Returns None when there are no logs.
+    """
+    import numpy as np
+
+    max_day = ANALYTICS_SETTINGS["MAX_CYCLE_DAY"]
+    logs = SymptomLog.objects.all() if user is None else SymptomLog.objects.filter(user=user)
+    entries = SymptomLogSymptom.objects.all() if user is None else SymptomLogSymptom.objects.filter(user=user)
+
+    day_totals = dict(logs.values_list("cycle_day").annotate(count=Count("id")).order_by())
+    total_logs = sum(day_totals.values())
+    if not total_logs:
+        return None
+    logs_per_day = np.zeros(max_day, dtype=np.int64)
+    for day, count in day_totals.items():
+        if day is not None and 1 <= day <= max_day:
+            logs_per_day[day - 1] = count
+
+    top = list(
+        entries.values_list("symptom_id", "symptom__name")
+        .annotate(count=Count("id"))
+        .order_by("-count", "symptom__name")[: ANALYTICS_SETTINGS["TOP_SYMPTOMS"]]
+    )
+    top_ids = np.array(sorted(symptom_id for symptom_id, _, _ in top))
+    names = {symptom_id: name for symptom_id, name, _ in top}
+    size = len(top_ids)
+
+    # Float matrices so X.T @ X goes through BLAS; counts stay exact well past any real table size
+    co_occurrence = np.zeros((size, size))
+    heatmap = np.zeros((size, max_day), dtype=np.int64)
+    if size:
+        pairs = (
+            entries.filter(symptom_id__in=top_ids.tolist())
+            .order_by("log_id")
+            .values_list("log_id", "symptom_id", "log__cycle_day")
+        )
+        for log_ids, symptom_ids, cycle_days in _iter_incidence_batches(pairs):
+            rows = np.unique(log_ids, return_inverse=True)[1]
+            columns = np.searchsorted(top_ids, symptom_ids)
+            incidence = np.zeros((rows.max() + 1, size))
+            incidence[rows, columns] = 1
+            co_occurrence += incidence.T @ incidence
+
+            on_heatmap = (cycle_days >= 1) & (cycle_days <= max_day)
+            np.add.at(heatmap, (columns[on_heatmap], cycle_days[on_heatmap] - 1), 1)
+    co_occurrence = np.rint(co_occurrence).astype(np.int64)
+
+    # Show the most common symptoms first
+    order = np.argsort(-np.diag(co_occurrence), kind="stable")
+    co_occurrence = co_occurrence[np.ix_(order, order)]
+    heatmap = heatmap[order]
+    symptom_counts = np.diag(co_occurrence).astype(float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frequency = np.where(logs_per_day > 0, heatmap / logs_per_day, np.nan)
+        # P(A and B) / (P(A) * P(B)): above 1 means the pair is logged together more than chance
+        lift = co_occurrence * total_logs / np.outer(symptom_counts, symptom_counts)
+    np.fill_diagonal(lift, np.nan)
+
+    return {
+        "total_logs": total_logs,
+        "symptoms": [names[symptom_id] for symptom_id in top_ids[order].tolist()],
+        "symptom_counts": symptom_counts.astype(int).tolist(),
+        "cycle_days": list(range(1, max_day + 1)),
+        "logs_per_cycle_day": logs_per_day.tolist(),
+        "heatmap": {
+            "counts": heatmap.tolist(),
+            "frequency": _nullable(frequency),
+        },
+        "co_occurrence": co_occurrence.tolist(),
+        "lift": _nullable(lift),
+    }
+
+
+def get_symptom_analytics(user):
+    """The user's analytics, recomputed only after their symptom logs change."""
+    key = f"symptom-analytics:user:{user.pk}:{data_versions(user)[1]}"
+    result = cache.get(key)
+    if result is None:
+        result = compute_symptom_analytics(user)
+        cache.set(key, result, ANALYTICS_SETTINGS["USER_TTL"])
+    return result
+
+
+def get_population_analytics():
+    """Analytics over every user's logs, refreshed every POPULATION_TTL seconds."""
+    key = "symptom-analytics:population"
+    result = cache.get(key)
+    if result is None:
+        result = compute_symptom_analytics()
+        cache.set(key, result, ANALYTICS_SETTINGS["POPULATION_TTL"])
+    return result
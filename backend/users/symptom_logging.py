@@ -0,0 +1,135 @@
+"""
+Writing symptom logs, one day or many at a time.
+
+Logging symptoms for a date that already has a log merges the new symptoms
+into it. On PostgreSQL all entries are written with a single
+INSERT ... ON CONFLICT (user_id, date) DO UPDATE that merges the JSON arrays in
+the database, so concurrent posts for the same day cannot race on the unique
+constraint. Other backends (SQLite in development) merge in Python inside a
+transaction. Cycle days for every entry come from one range query over the
+user's periods.
+
+The user's CycleStats row is locked first, by the UPDATE that bumps its
+symptoms_version, as the period writers in users.cycles lock it before
+recomputing cycle days, so a period logged or deleted concurrently either
+waits for this write or is finished before the cycle days are read: the two
+never deadlock on the symptom rows, and no log is written with a cycle day
+from a period history that just changed. While the lock is held, each log's
+symptoms before the write are the ones its interned rows were synced from, so
+only the names the write adds are interned.
+"""
+import json
+
+from django.db import connection, transaction
+
+from .cycle_days import cycle_days_for
+from .models import SymptomLog
+from .symptoms import add_log_symptoms, symptom_names
+from .versioning import bump_symptoms_version
+
+MAX_BATCH_DAYS = 366
+
+# `previous` reads the logs as they were before the statement's own insert
+UPSERT_SQL = """
+WITH previous AS (
+    SELECT date, symptoms FROM users_symptomlog WHERE user_id = %s AND date IN ({dates})
+), upserted AS (
+INSERT INTO users_symptomlog (user_id, date, cycle_day, symptoms, created_at)
+VALUES {values}
+ON CONFLICT (user_id, date) DO UPDATE SET
+    cycle_day = EXCLUDED.cycle_day,
+    symptoms = (
+        SELECT jsonb_agg(DISTINCT merged.value)
+        FROM jsonb_array_elements(
+            CASE jsonb_typeof(users_symptomlog.symptoms)
+                WHEN 'array' THEN users_symptomlog.symptoms
+                ELSE jsonb_build_array(users_symptomlog.symptoms)
+            END || EXCLUDED.symptoms
+        ) AS merged
+    )
+RETURNING id, date, cycle_day, symptoms, (xmax = 0) AS inserted
+)
+SELECT upserted.id, upserted.date, upserted.cycle_day, upserted.symptoms, upserted.inserted, previous.symptoms
+FROM upserted LEFT JOIN previous ON previous.date = upserted.date
+"""
+
+
+def _merge_entries(entries):
+    """Folds entries for the same date into one, keeping the first-seen symptom order."""
+    merged = {}
+    for day, symptoms in entries:
+        merged.setdefault(day, []).extend(symptoms)
+    return {day: list(dict.fromkeys(symptoms)) for day, symptoms in merged.items()}
+
+
+def _load_json(value):
+    # Django hands jsonb back undecoded so JSONField can parse it itself
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _postgres_upsert(user, symptoms_by_date, cycle_days):
+    dates = ", ".join(["%s"] * len(symptoms_by_date))
+    values, params = [], [user.pk, *symptoms_by_date]
+    for day, symptoms in symptoms_by_date.items():
+        values.append("(%s, %s, %s, %s::jsonb, now())")
+        params.extend([user.pk, day, cycle_days[day], json.dumps(symptoms)])
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_SQL.format(dates=dates, values=", ".join(values)), params)
+        rows = cursor.fetchall()
+    return [
+        (
+            SymptomLog(id=log_id, user=user, date=day, cycle_day=cycle_day, symptoms=_load_json(symptoms)),
+            inserted,
+            _load_json(previous),
+        )
+        for log_id, day, cycle_day, symptoms, inserted, previous in rows
+    ]
+
+
+def _python_upsert(user, symptoms_by_date, cycle_days):
+    existing = {
+        log.date: log
+        for log in SymptomLog.objects.select_for_update().filter(user=user, date__in=symptoms_by_date)
+    }
+    new_logs, updated_logs, changed_logs = [], [], []
+    for day, symptoms in symptoms_by_date.items():
+        log = existing.get(day)
+        if log is None:
+            new_logs.append(SymptomLog(user=user, date=day, cycle_day=cycle_days[day], symptoms=symptoms))
+            continue
+        previous = log.symptoms
+        current = previous if isinstance(previous, list) else [previous]
+        log.symptoms = list(dict.fromkeys(current + symptoms))
+        if (log.symptoms, log.cycle_day) != (previous, cycle_days[day]):
+            log.cycle_day = cycle_days[day]
+            changed_logs.append(log)
+        updated_logs.append((log, previous))
+
+    SymptomLog.objects.bulk_create(new_logs, batch_size=1000)
+    if new_logs and new_logs[0].pk is None:  # Backends without RETURNING on bulk inserts
+        created = SymptomLog.objects.filter(user=user, date__in=[log.date for log in new_logs])
+        new_logs = list(created)
+    SymptomLog.objects.bulk_update(changed_logs, ["symptoms", "cycle_day"], batch_size=1000)
+    return [(log, True, None) for log in new_logs] + [(log, False, previous) for log, previous in updated_logs]
+
+
+@transaction.atomic
+def log_symptoms(user, entries):
+    """
+    Saves (date, symptoms) entries for the user, merging into existing logs for
+    the same dates. Returns [(log, created)] sorted by date.
+    """
+    symptoms_by_date = _merge_entries(entries)
+    if not symptoms_by_date:
+        return []
+    # Before any read or write of periods and logs, as it locks the CycleStats row; see the module docstring
+    bump_symptoms_version(user)
+    cycle_days = cycle_days_for(user.pk, list(symptoms_by_date))
+
+    if connection.vendor == "postgresql":
+        results = _postgres_upsert(user, symptoms_by_date, cycle_days)
+    else:
+        results = _python_upsert(user, symptoms_by_date, cycle_days)
+
+    add_log_symptoms([(log, symptom_names(log.symptoms) - symptom_names(previous)) for log, _, previous in results])
+    return sorted(((log, created) for log, created, _ in results), key=lambda result: result[0].date)
@@ -0,0 +1,78 @@
+"""
+Symptom report aggregation: which symptoms were logged on each cycle day, and
+the range of cycle days each symptom appears on.
+
+On PostgreSQL the whole report is one query that unnests the symptoms JSON
+with jsonb_array_elements_text and aggregates in the database. Other backends
+(SQLite in development) stream the logs in cycle-day order and build the report
+in a single pass.
+"""
+import json
+from collections import defaultdict
+
+from django.db import connection
+
+from .models import SymptomLog
+
+REPORT_SQL = """
+WITH pairs AS (
+    SELECT DISTINCT entry.cycle_day, symptom.value AS symptom
+    FROM users_symptomlog entry
+    CROSS JOIN LATERAL jsonb_array_elements_text(entry.symptoms) AS symptom(value)
+    WHERE entry.user_id = %s
+      AND entry.cycle_day IS NOT NULL
+      AND jsonb_typeof(entry.symptoms) = 'array'
+)
+SELECT
+    (SELECT jsonb_object_agg(cycle_day, symptoms)
+     FROM (SELECT cycle_day, jsonb_agg(symptom ORDER BY symptom) AS symptoms
+           FROM pairs GROUP BY cycle_day) days),
+    (SELECT jsonb_object_agg(symptom, jsonb_build_object('min_cycle_day', min_day, 'max_cycle_day', max_day))
+     FROM (SELECT symptom, MIN(cycle_day) AS min_day, MAX(cycle_day) AS max_day
+           FROM pairs GROUP BY symptom) ranges)
+"""
+
+
+def _load_json(value):
+    # Django hands jsonb back undecoded so JSONField can parse it itself
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _postgres_report(user):
+    with connection.cursor() as cursor:
+        cursor.execute(REPORT_SQL, [user.pk])
+        by_day, ranges = cursor.fetchone()
+    if by_day is None:
+        return None
+    return _load_json(by_day), _load_json(ranges)
+
+
+def _python_report(user):
+    logs = (
+        SymptomLog.objects.filter(user=user, cycle_day__isnull=False)
+        .order_by("cycle_day")
+        .values_list("cycle_day", "symptoms")
+    )
+    by_day = defaultdict(set)
+    ranges = {}
+    for cycle_day, symptoms in logs.iterator(chunk_size=2000):
+        by_day[cycle_day].update(symptoms)
+        for symptom in symptoms:
+            if symptom in ranges:
+                ranges[symptom]["max_cycle_day"] = cycle_day  # Logs arrive in cycle-day order
+            else:
+                ranges[symptom] = {"min_cycle_day": cycle_day, "max_cycle_day": cycle_day}
+    if not by_day:
+        return None
+    return {str(day): sorted(symptoms) for day, symptoms in by_day.items()}, ranges
+
+
+def build_symptom_report(user):
+    """
+    Returns (symptoms_by_cycle_day, symptom_ranges) for the user's logs that
+    have a cycle day, or None if there are none. Day keys are strings, as the
+    report is serialized to JSON.
+    """
+    if connection.vendor == "postgresql":
+        return _postgres_report(user)
+    return _python_report(user)
@@ -0,0 +1,123 @@
+"""
+Symptom counts over time for the analytics dashboard.
+
+Logs are bucketed in the database, by calendar week or month with TruncWeek /
+TruncMonth, or by menstrual cycle with a "latest period started on or before
+this date" subquery, and counted per bucket and symptom from the interned
+symptom rows. Only the aggregated rows reach Python. Weeks, months and cycles
+with no logs are filled in with zeros, so every point covers the same number
+of buckets. When a history has more buckets than the requested number of
+points, consecutive buckets are merged so the response size stays bounded
+however many years are logged.
+"""
+from datetime import date, timedelta
+from math import ceil
+
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import MenstrualData, SymptomLog, SymptomLogSymptom
+
+GRANULARITIES = ("week", "month", "cycle")
+
+TREND_SETTINGS = {
+    "MAX_POINTS": 104,  # Upper bound for ?max_points
+    "TOP_SYMPTOMS": 10,  # Series returned when no ?symptom= is given
+    **getattr(settings, "SYMPTOM_TRENDS", {}),
+}
+
+
+def _bucket(granularity):
+    """Expression giving the first day of a row's bucket; works on SymptomLog and SymptomLogSymptom."""
+    if granularity == "week":
+        return TruncWeek("date")
+    if granularity == "month":
+        return TruncMonth("date")
+    # The cycle a day belongs to starts at the user's latest period on or before it
+    return Subquery(
+        MenstrualData.objects.filter(user_id=OuterRef("user_id"), start_date__lte=OuterRef("date"))
+        .order_by("-start_date")
+        .values("start_date")[:1]
+    )
+
+
+def _bucket_grid(user, granularity, first, last):
+    """Every bucket start from first to last inclusive, whether or not anything was logged in it."""
+    if granularity == "week":
+        return [first + timedelta(weeks=i) for i in range((last - first).days // 7 + 1)]
+    if granularity == "month":
+        months = (last.year - first.year) * 12 + last.month - first.month
+        return [
+            date(first.year + (first.month - 1 + i) // 12, (first.month - 1 + i) % 12 + 1, 1)
+            for i in range(months + 1)
+        ]
+    return list(
+        MenstrualData.objects.filter(user=user, start_date__gte=first, start_date__lte=last)
+        .order_by("start_date").values_list("start_date", flat=True).distinct()
+    )
+
+
+def _downsample(buckets, max_points):
+    """Merges runs of consecutive buckets so at most max_points remain. Returns (points, buckets_per_point)."""
+    size = max(1, ceil(len(buckets) / max_points))
+    points = []
+    for i in range(0, len(buckets), size):
+        group = buckets[i:i + size]
+        points.append({
+            "start": group[0][0],
+            "logs": sum(logs for _, logs, _ in group),
+            "counts": [sum(counts) for counts in zip(*(counts for _, _, counts in group))],
+        })
+    return points, size
+
+
+def symptom_trends(user, granularity, max_points, start_date=None, end_date=None, symptoms=None):
+    """
+    Returns the user's log count and per-symptom counts in each bucket, oldest
+    first. `symptoms` picks the series; by default the most logged ones in the
+    range are used. Days before the user's first period have no cycle and are
+    left out of the "cycle" granularity.
+    """
+    logs = SymptomLog.objects.filter(user=user)
+    entries = SymptomLogSymptom.objects.filter(user=user)
+    if start_date:
+        logs, entries = logs.filter(date__gte=start_date), entries.filter(date__gte=start_date)
+    if end_date:
+        logs, entries = logs.filter(date__lte=end_date), entries.filter(date__lte=end_date)
+
+    if not symptoms:
+        symptoms = list(
+            entries.values_list("symptom__name", flat=True)
+            .annotate(count=Count("id"))
+            .order_by("-count", "symptom__name")[: TREND_SETTINGS["TOP_SYMPTOMS"]]
+        )
+
+    log_counts = dict(
+        logs.annotate(bucket=_bucket(granularity)).values_list("bucket").annotate(count=Count("id")).order_by()
+    )
+    symptom_counts = (
+        entries.filter(symptom__name__in=symptoms)
+        .annotate(bucket=_bucket(granularity))
+        .values_list("bucket", "symptom__name")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    columns = {name: i for i, name in enumerate(symptoms)}
+    counts_by_bucket = {}
+    for bucket, name, count in symptom_counts:
+        counts_by_bucket.setdefault(bucket, [0] * len(symptoms))[columns[name]] = count
+
+    log_counts.pop(None, None)  # Days before the user's first period
+    grid = _bucket_grid(user, granularity, min(log_counts), max(log_counts)) if log_counts else []
+    buckets = [
+        (bucket, log_counts.get(bucket, 0), counts_by_bucket.get(bucket, [0] * len(symptoms)))
+        for bucket in sorted(set(grid) | log_counts.keys())
+    ]
+    points, buckets_per_point = _downsample(buckets, max_points)
+    return {
+        "granularity": granularity,
+        "buckets_per_point": buckets_per_point,
+        "symptoms": symptoms,
+        "points": points,
+    }
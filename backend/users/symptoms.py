@@ -0,0 +1,89 @@
+"""
+Interned symptom vocabulary.
+
+SymptomLog.symptoms stays the free-form JSON list the API reads and writes.
+Every distinct name is also stored once in Symptom, and each log's names are
+mirrored as SymptomLogSymptom rows holding small integer ids. Filtering logs by
+symptom then walks the (user, symptom, date) index instead of decoding JSON.
+Writes to SymptomLog must go through sync_log_symptoms to keep the two in step.
+"""
+from django.db import transaction
+
+from .models import Symptom, SymptomLogSymptom
+
+MAX_SYMPTOM_NAME_LENGTH = Symptom._meta.get_field("name").max_length
+
+
+def symptom_names(symptoms):
+    """The distinct names in a symptoms JSON value that can be interned."""
+    if not isinstance(symptoms, list):
+        return set()
+    return {
+        name for name in symptoms
+        if isinstance(name, str) and name and len(name) <= MAX_SYMPTOM_NAME_LENGTH
+    }
+
+
+def intern_symptoms(names):
+    """Returns {name: symptom_id} for the given names, adding any new ones to the vocabulary."""
+    names = set(names)
+    ids = dict(Symptom.objects.filter(name__in=names).values_list("name", "id"))
+    missing = names - ids.keys()
+    if missing:
+        # Another request may add the same names concurrently; ignore_conflicts lets both succeed
+        Symptom.objects.bulk_create([Symptom(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Symptom.objects.filter(name__in=missing).values_list("name", "id"))
+    return ids
+
+
+@transaction.atomic
+def sync_log_symptoms(logs):
+    """Replaces the interned symptom rows of the given saved logs with their current JSON symptoms."""
+    logs = [log for log in logs if log.pk]
+    if not logs:
+        return
+    names_by_log = {log.pk: symptom_names(log.symptoms) for log in logs}
+    ids = intern_symptoms(set().union(*names_by_log.values()))
+
+    SymptomLogSymptom.objects.filter(log__in=[log.pk for log in logs]).delete()
+    SymptomLogSymptom.objects.bulk_create(
+        [
+            SymptomLogSymptom(log_id=log.pk, symptom_id=ids[name], user_id=log.user_id, date=log.date)
+            for log in logs
+            for name in names_by_log[log.pk]
+        ],
+        batch_size=1000,
+    )
+
+
+def add_log_symptoms(added):
+    """
+    Adds the interned rows for names newly added to saved logs, given as
+    [(log, names)]. Only for writers that never drop a name from a log (the
+    merge in users.symptom_logging): the rows for the log's other names are
+    already in place, so nothing is deleted, and nothing is queried at all
+    when no name is new.
+    """
+    added = [(log, names) for log, names in added if names]
+    if not added:
+        return
+    ids = intern_symptoms(set().union(*(names for _, names in added)))
+    SymptomLogSymptom.objects.bulk_create(
+        [
+            SymptomLogSymptom(log_id=log.pk, symptom_id=ids[name], user_id=log.user_id, date=log.date)
+            for log, names in added
+            for name in names
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,  # A row that is already there is left as it is
+    )
+
+
+def filter_by_symptom(logs, user, name):
+    """Narrows a queryset of the user's symptom logs to those that include the named symptom."""
+    symptom_id = Symptom.objects.filter(name=name).values_list("id", flat=True).first()
+    if symptom_id is None:
+        return logs.none()
+    return logs.filter(
+        pk__in=SymptomLogSymptom.objects.filter(user=user, symptom_id=symptom_id).values("log_id")
+    )
@@ -1,3 +1,682 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users import chat_buffer, chat_cache, chat_views
+from users.article_search import search_articles
+from users.cycle_days import recompute_cycle_days
+from users.cycles import delete_period, log_period, predict_next_cycle, rebuild_cycle_stats
+from users.forecasting import run_forecasts
+from users.intents import answer_locally, classifier
+from users.management.commands import explain_hot_queries
+from users.models import Article, ChatSession, CustomUser, CycleForecast, CycleStats, MenstrualData, Message, SymptomLog
+from users.resilience import CircuitBreaker, CircuitOpenError, Deadline, dialogflow_breaker, openai_breaker
+from users.symptom_logging import log_symptoms
+from users.symptoms import filter_by_symptom
+from users.versioning import data_versions
+
+
+class FakeSessionsPool:
+    """Stands in for the Dialogflow client pool: fails, or hangs until the caller's timeout."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.calls = 0
+
+    def detect_intent(self, request, timeout=None, **kwargs):
+        self.calls += 1
+        if self.mode == "hang":
+            time.sleep(timeout)
+            raise TimeoutError("Dialogflow did not answer in time")
+        raise ConnectionError("Dialogflow is down")
+
+
+def fake_openai_client(reply="Here is what I found.", error=None):
+    client = mock.Mock()
+    if error is not None:
+        client.chat.completions.create.side_effect = error
+    else:
+        client.chat.completions.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply))]
+        )
+    return client
+
+
+@override_settings(CHAT_WRITE_BUFFER={"ENABLED": False})
+class ChatbotFallbackTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="luna", email="luna@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        chat_buffer._buffer = None
+        chat_buffer._known_chats.clear()  # Chat ids cached by earlier tests were rolled back
+        chat_cache._cache = None  # A fresh reply cache, so no test answers from another's replies
+        for breaker in (dialogflow_breaker, openai_breaker):
+            breaker.reset()
+            self.addCleanup(breaker.reset)
+        for name, value in (("OPENAI_API_KEY", "sk-test"), ("DIALOGFLOW_TIMEOUT", 0.05)):
+            patcher = mock.patch.object(chat_views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def use_providers(self, pool, openai_client):
+        for name, value in (
+            ("get_sessions_pool", lambda credentials=None: pool),
+            ("get_credentials", lambda: None),
+            ("get_openai_client", lambda: openai_client),
+        ):
+            patcher = mock.patch.object(chat_views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ask(self, message):
+        response = self.client.post(
+            "/api/users/chatbot-response/", {"message": message, "session_id": "fault-session"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["response"]
+
+    def test_failing_dialogflow_falls_back_to_gpt(self):
+        pool = FakeSessionsPool("fail")
+        self.use_providers(pool, fake_openai_client("GPT answer"))
+
+        self.assertEqual(self.ask("tell me about zebra migrations"), "GPT answer")
+        self.assertEqual(pool.calls, 1)
+        self.assertEqual(dialogflow_breaker.failures, 1)
+        self.assertEqual(
+            list(Message.objects.order_by("id").values_list("sender", "text")),
+            [("user", "tell me about zebra migrations"), ("bot", "GPT answer")],
+        )
+
+    def test_breaker_opens_and_stops_calling_dialogflow(self):
+        pool = FakeSessionsPool("fail")
+        self.use_providers(pool, fake_openai_client("GPT answer"))
+
+        for i in range(dialogflow_breaker.failure_threshold):
+            self.ask(f"question about zebras number {i}")
+        self.assertEqual(dialogflow_breaker.state, CircuitBreaker.OPEN)
+
+        self.assertEqual(self.ask("one more question about zebras"), "GPT answer")
+        self.assertEqual(pool.calls, dialogflow_breaker.failure_threshold)
+
+    def test_degraded_reply_when_both_providers_fail(self):
+        openai_client = fake_openai_client(error=ConnectionError("OpenAI is down"))
+        self.use_providers(FakeSessionsPool("fail"), openai_client)
+
+        for i in range(openai_breaker.failure_threshold):
+            self.assertTrue(self.ask(f"question about zebras number {i}").startswith(chat_views.CHAT_ERROR_REPLY))
+        self.assertEqual(openai_breaker.state, CircuitBreaker.OPEN)
+
+        self.assertEqual(self.ask("one more question about zebras"), chat_views.DEGRADED_REPLY)
+        self.assertEqual(openai_client.chat.completions.create.call_count, openai_breaker.failure_threshold)
+
+    def test_hanging_dialogflow_is_cut_off_at_its_timeout(self):
+        pool = FakeSessionsPool("hang")
+        self.use_providers(pool, fake_openai_client("GPT answer"))
+
+        started = time.monotonic()
+        self.assertEqual(self.ask("tell me about zebra migrations"), "GPT answer")
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(dialogflow_breaker.failures, 1)
+
+
+class IntentTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="gwen", email="gwen@example.com", password="pw")
+
+    def intent(self, message):
+        match = classifier.classify(message)
+        return match and match.intent
+
+    def test_greetings(self):
+        for message in ("Hi!", "hello there", "Good morning", "hey Luna", "hi there luna"):
+            with self.subTest(message):
+                self.assertEqual(answer_locally(self.user, message), "Hi! I'm Luna. How can I help you today?")
+
+    def test_greeting_word_followed_by_something_else_is_not_a_greeting(self):
+        for message in ("hi cramps", "hey stop", "hello doctor", "hi there bleeding"):
+            with self.subTest(message):
+                self.assertIsNone(answer_locally(self.user, message))
+        self.assertIsNone(self.intent("hi i have cramps"))
+
+    def test_contractions(self):
+        for message in ("What's my next period?", "what’s my next period", "whats my next period"):
+            with self.subTest(message):
+                self.assertEqual(self.intent(message), "period_prediction")
+        for message in ("What's my fertile window?", "what’s my ovulation date"):
+            with self.subTest(message):
+                self.assertEqual(self.intent(message), "fertile_window")
+
+
+class CircuitBreakerTests(TestCase):
+    def half_open_breaker(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        return breaker
+
+    def test_open_breaker_rejects_calls(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+        with self.assertRaises(ConnectionError):
+            breaker.call(mock.Mock(side_effect=ConnectionError))
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(mock.Mock())
+
+    def test_cancelled_probe_is_released_without_a_failure(self):
+        breaker = self.half_open_breaker()
+
+        async def cancel_probe():
+            probe = asyncio.ensure_future(breaker.acall(lambda: asyncio.sleep(10)))
+            await asyncio.sleep(0)
+            probe.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await probe
+
+        async_to_sync(cancel_probe)()
+        self.assertEqual((breaker.state, breaker.failures), (CircuitBreaker.HALF_OPEN, 1))
+        self.assertTrue(breaker.allow())  # The next probe is let through instead of being stuck
+
+    def abandon_gpt_stream(self):
+        async def chunks():
+            for token in ("Hello", " there"):
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+        client = mock.Mock()
+        client.chat.completions.create = mock.AsyncMock(return_value=chunks())
+
+        async def read_first_token():
+            stream = chat_views.stream_gpt_response_async("hello", Deadline(5))
+            first = await stream.__anext__()
+            await stream.aclose()  # What a client disconnect does to the streaming response
+            return first
+
+        with mock.patch.object(chat_views, "OPENAI_API_KEY", "sk-test"), \
+                mock.patch.object(chat_views, "get_async_openai_client", lambda: client):
+            self.assertEqual(async_to_sync(read_first_token)(), "Hello")
+
+    def test_abandoned_gpt_streams_are_not_failures(self):
+        openai_breaker.reset()
+        self.addCleanup(openai_breaker.reset)
+
+        for _ in range(openai_breaker.failure_threshold):
+            self.abandon_gpt_stream()
+        self.assertEqual((openai_breaker.state, openai_breaker.failures), (CircuitBreaker.CLOSED, 0))
+
+    def test_abandoned_gpt_stream_releases_probe(self):
+        self.addCleanup(openai_breaker.reset)
+        with mock.patch.object(openai_breaker, "reset_timeout", 0), \
+                mock.patch.object(openai_breaker, "failure_threshold", 1):
+            openai_breaker.record_failure()  # Open, and half-open once the stream is asked for
+            self.abandon_gpt_stream()
+        self.assertEqual(openai_breaker.failures, 1)
+        self.assertFalse(openai_breaker._probe_in_flight)
+
+
+class CycleStatsTests(TestCase):
+    STATS_FIELDS = [
+        "period_count", "period_length_sum", "first_start_date", "last_start_date", "last_end_date",
+        "avg_cycle_length", "avg_period_length", "next_period_start", "next_period_end",
+        "fertile_window_start", "fertile_window_end",
+    ]
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="selene", email="selene@example.com", password="pw")
+
+    def log(self, start_date, period_length=5):
+        return log_period(self.user, start_date, start_date + timedelta(days=period_length - 1), period_length)
+
+    def cycle_lengths(self):
+        periods = MenstrualData.objects.filter(user=self.user).order_by("start_date")
+        return list(periods.values_list("start_date", "cycle_length"))
+
+    def assertStatsMatchRebuild(self):
+        """The running totals kept by log_period/delete_period equal ones recomputed from scratch."""
+        stats = CycleStats.objects.get(pk=self.user.pk)
+        rebuilt = rebuild_cycle_stats(self.user)
+        self.assertEqual(
+            {field: getattr(stats, field) for field in self.STATS_FIELDS},
+            {field: getattr(rebuilt, field) for field in self.STATS_FIELDS},
+        )
+        return stats
+
+    def test_running_totals(self):
+        self.log(date(2024, 1, 1), 5)
+        self.log(date(2024, 2, 1), 4)
+        self.log(date(2024, 3, 3), 6)
+
+        stats = self.assertStatsMatchRebuild()
+        self.assertEqual((stats.period_count, stats.period_length_sum), (3, 15))
+        self.assertEqual((stats.avg_cycle_length, stats.avg_period_length), (31, 5))  # 62 days over two cycles
+        self.assertEqual(stats.next_period_start, date(2024, 3, 8) + timedelta(days=31))
+        self.assertEqual(predict_next_cycle(self.user)["fertile_window_start"], date(2024, 3, 25))
+
+    def test_period_logged_out_of_order(self):
+        self.log(date(2024, 1, 1))
+        self.log(date(2024, 3, 1))
+        self.log(date(2024, 2, 1))
+
+        self.assertEqual(
+            self.cycle_lengths(), [(date(2024, 1, 1), 28), (date(2024, 2, 1), 31), (date(2024, 3, 1), 29)]
+        )
+        stats = self.assertStatsMatchRebuild()
+        self.assertEqual((stats.first_start_date, stats.last_start_date), (date(2024, 1, 1), date(2024, 3, 1)))
+
+    def test_delete_relinks_the_next_period(self):
+        january, february, _ = [self.log(day) for day in (date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1))]
+
+        delete_period(february)
+        self.assertEqual(self.cycle_lengths(), [(date(2024, 1, 1), 28), (date(2024, 3, 1), 60)])
+        self.assertStatsMatchRebuild()
+
+        delete_period(january)  # The first period: March becomes it and gets the default length
+        self.assertEqual(self.cycle_lengths(), [(date(2024, 3, 1), 28)])
+        stats = self.assertStatsMatchRebuild()
+        self.assertEqual((stats.period_count, stats.first_start_date), (1, date(2024, 3, 1)))
+
+    def test_deleting_the_last_period(self):
+        period = self.log(date(2024, 1, 1))
+        version = CycleStats.objects.get(pk=self.user.pk).periods_version
+
+        delete_period(period)
+
+        stats = self.assertStatsMatchRebuild()
+        self.assertEqual((stats.period_count, stats.last_end_date, stats.next_period_start), (0, None, None))
+        self.assertGreater(stats.periods_version, version)
+        self.assertIsNone(predict_next_cycle(self.user))
+
+
+class CycleDayTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="phoebe", email="phoebe@example.com", password="pw")
+        log_period(self.user, date(2024, 1, 1), date(2024, 1, 5), 5)
+        self.february = log_period(self.user, date(2024, 2, 1), date(2024, 2, 5), 5)
+        log_symptoms(self.user, [(day, ["Cramps"]) for day in (date(2024, 1, 10), date(2024, 2, 5), date(2024, 2, 20))])
+
+    def cycle_days(self):
+        return dict(SymptomLog.objects.filter(user=self.user).values_list("date", "cycle_day"))
+
+    def test_moving_a_period_recomputes_cycle_days(self):
+        self.assertEqual(
+            self.cycle_days(), {date(2024, 1, 10): 10, date(2024, 2, 5): 5, date(2024, 2, 20): 20}
+        )
+        symptoms_version = data_versions(self.user)[1]
+
+        # The tracker moves a period by deleting it and logging the new dates
+        delete_period(self.february)
+        log_period(self.user, date(2024, 2, 10), date(2024, 2, 14), 5)
+
+        # Feb 5 now falls in January's cycle; the January log is untouched
+        self.assertEqual(
+            self.cycle_days(), {date(2024, 1, 10): 10, date(2024, 2, 5): 36, date(2024, 2, 20): 11}
+        )
+        self.assertGreater(data_versions(self.user)[1], symptoms_version)
+
+    def test_recompute_only_touches_the_window(self):
+        SymptomLog.objects.filter(user=self.user).update(cycle_day=99)
+        symptoms_version = data_versions(self.user)[1]
+
+        self.assertEqual(recompute_cycle_days([self.user.pk], date(2024, 2, 1), date(2024, 2, 10)), 1)
+        self.assertEqual(
+            self.cycle_days(), {date(2024, 1, 10): 99, date(2024, 2, 5): 5, date(2024, 2, 20): 99}
+        )
+        self.assertEqual(data_versions(self.user)[1], symptoms_version + 1)
+
+        # Nothing stale left in the window: no write and no version bump
+        self.assertEqual(recompute_cycle_days([self.user.pk], date(2024, 2, 1), date(2024, 2, 10)), 0)
+        self.assertEqual(data_versions(self.user)[1], symptoms_version + 1)
+
+
+class ForecastTests(TestCase):
+    HISTORIES = {
+        "one-period": [(date(2024, 1, 1), 5)],
+        "regular": [(date(2024, 1, 1), 5), (date(2024, 1, 29), 5), (date(2024, 2, 26), 4)],
+        # Gaps of 25, 34 and 28 days; averages that need rounding
+        "irregular": [(date(2024, 1, 3), 3), (date(2024, 1, 28), 6), (date(2024, 3, 2), 5), (date(2024, 3, 30), 7)],
+    }
+
+    def setUp(self):
+        self.users = {}
+        for name, periods in self.HISTORIES.items():
+            user = CustomUser.objects.create_user(username=name, email=f"{name}@example.com", password="pw")
+            for start_date, period_length in periods:
+                log_period(user, start_date, start_date + timedelta(days=period_length - 1), period_length)
+            self.users[name] = user
+
+    def test_matches_the_per_user_prediction(self):
+        user_ids = [user.pk for user in self.users.values()]
+        # Batches of about two periods, so users land in different batches
+        list(run_forecasts(horizon=3, batch_rows=2, user_ids=user_ids))
+
+        for name, user in self.users.items():
+            with self.subTest(name):
+                prediction = predict_next_cycle(user)
+                stats = CycleStats.objects.get(pk=user.pk)
+                forecasts = list(CycleForecast.objects.filter(user=user).order_by("sequence"))
+                self.assertEqual([forecast.sequence for forecast in forecasts], [1, 2, 3])
+
+                for step, forecast in enumerate(forecasts):
+                    offset = timedelta(days=stats.avg_cycle_length * step)
+                    self.assertEqual(forecast.avg_cycle_length, stats.avg_cycle_length)
+                    self.assertEqual(
+                        (forecast.period_start, forecast.period_end,
+                         forecast.fertile_window_start, forecast.fertile_window_end),
+                        (prediction["next_period_start"] + offset, prediction["next_period_end"] + offset,
+                         prediction["fertile_window_start"] + offset, prediction["fertile_window_end"] + offset),
+                    )
+
+                starts = [start_date for start_date, _ in self.HISTORIES[name]]
+                gaps = [(later - earlier).days for earlier, later in zip(starts, starts[1:])]
+                if len(gaps) > 1:
+                    self.assertAlmostEqual(forecasts[0].cycle_length_std, statistics.pstdev(gaps), places=2)
+                else:
+                    self.assertIsNone(forecasts[0].cycle_length_std)
+
+
+class PeriodImportTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="nova", email="nova@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_start_date_is_rejected(self):
+        periods = [
+            {"start_date": "2024-01-01", "end_date": "2024-01-05"},
+            {"start_date": "2024-01-01", "end_date": "2024-01-04"},
+        ]
+        response = self.client.post("/api/users/menstrual-data/import/", {"periods": periods}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("already used by period 1", response.json()["message"])
+        self.assertFalse(MenstrualData.objects.filter(user=self.user).exists())
+
+    def test_stored_duplicates_are_merged(self):
+        for end_day in (5, 6):
+            MenstrualData.objects.create(
+                user=self.user, start_date=date(2024, 1, 1), end_date=date(2024, 1, end_day),
+                period_length=end_day, cycle_length=28,
+            )
+        periods = [
+            {"start_date": "2024-01-01", "end_date": "2024-01-04"},
+            {"start_date": "2024-01-29", "end_date": "2024-02-02"},
+        ]
+        response = self.client.post("/api/users/menstrual-data/import/", {"periods": periods}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["created"], response.json()["merged"]), (1, 1))
+        self.assertEqual(
+            list(MenstrualData.objects.filter(user=self.user).order_by("start_date").values_list(
+                "start_date", "end_date", "cycle_length"
+            )),
+            [(date(2024, 1, 1), date(2024, 1, 4), 28), (date(2024, 1, 29), date(2024, 2, 2), 28)],
+        )
+
+
+class HotQueryIndexTests(TestCase):
+    def test_hot_queries_use_their_indexes(self):
+        command = explain_hot_queries.Command()
+        with transaction.atomic():
+            user, chat = command.seed(user_count=200, rows=30)
+            command.prepare_planner()
+            for query in command.hot_queries(user, chat):
+                with self.subTest(query.name):
+                    plan = query.queryset.explain()
+                    self.assertTrue(any(index in plan for index in query.indexes), plan)
+                    if query.ordered:
+                        self.assertFalse(
+                            [marker for marker in explain_hot_queries.SORT_MARKERS if marker in plan], plan
+                        )
+            transaction.set_rollback(True)
+
+
+class SymptomAnalyticsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="iris", email="iris@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cache.clear()  # Population results cached by an earlier test would hide this one's logs
+        log_symptoms(self.user, [(date(2024, 1, 2), ["Cramps", "Fatigue"]), (date(2024, 1, 3), ["Cramps"])])
+
+    def test_population_scope_is_staff_only(self):
+        response = self.client.get("/api/users/symptom-analytics/?scope=population")
+        self.assertEqual(response.status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/api/users/symptom-analytics/?scope=population")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["symptoms"], ["Cramps", "Fatigue"])
+
+    def test_user_scope(self):
+        response = self.client.get("/api/users/symptom-analytics/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["total_logs"], response.json()["co_occurrence"]), (2, [[2, 1], [1, 1]]))
+
+
+class SymptomLoggingTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="nova", email="nova@example.com", password="pw")
+        log_symptoms(self.user, [(date(2024, 1, 3), ["Cramps"])])
+
+    def logged_with(self, name):
+        logs = filter_by_symptom(SymptomLog.objects.filter(user=self.user), self.user, name)
+        return [(day, sorted(symptoms)) for day, symptoms in logs.values_list("date", "symptoms")]
+
+    def test_merge_interns_only_the_added_names(self):
+        [(log, created)] = log_symptoms(self.user, [(date(2024, 1, 3), ["Bloating", "Cramps"])])
+
+        self.assertFalse(created)
+        self.assertEqual(sorted(log.symptoms), ["Bloating", "Cramps"])
+        self.assertEqual(self.logged_with("Cramps"), [(date(2024, 1, 3), ["Bloating", "Cramps"])])
+        self.assertEqual(self.logged_with("Bloating"), [(date(2024, 1, 3), ["Bloating", "Cramps"])])
+
+    def test_unchanged_day_skips_the_vocabulary(self):
+        versions = data_versions(self.user)
+        # Savepoint, version bump (which takes the lock), cycle days, log upsert, release
+        with self.assertNumQueries(5):
+            log_symptoms(self.user, [(date(2024, 1, 3), ["Cramps"])])
+        self.assertEqual(data_versions(self.user), (versions[0], versions[1] + 1))
+
+
+class SymptomTrendsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="vega", email="vega@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Nothing logged in February or March
+        log_symptoms(self.user, [(date(2024, 1, 10), ["Cramps"]), (date(2024, 4, 10), ["Cramps", "Acne"])])
+
+    def trends(self, max_points):
+        response = self.client.get(f"/api/users/symptom-trends/?granularity=month&max_points={max_points}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_empty_months_are_zero_points(self):
+        trends = self.trends(12)
+
+        self.assertEqual(
+            [(point["start"], point["logs"]) for point in trends["points"]],
+            [("2024-01-01", 1), ("2024-02-01", 0), ("2024-03-01", 0), ("2024-04-01", 1)],
+        )
+
+    def test_downsampled_points_cover_equal_spans(self):
+        trends = self.trends(2)
+
+        self.assertEqual(trends["buckets_per_point"], 2)
+        self.assertEqual([point["start"] for point in trends["points"]], ["2024-01-01", "2024-03-01"])
+
+
+class CalendarETagTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="cleo", email="cleo@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_current_month_etag_changes_with_the_month(self):
+        etag = self.client.get("/api/users/calendar/")["ETag"]
+        self.assertEqual(self.client.get("/api/users/calendar/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with mock.patch("users.versioning.date") as fake_date:
+            fake_date.today.return_value = date.today().replace(day=1) + timedelta(days=32)
+            response = self.client.get("/api/users/calendar/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_explicit_window_etag_ignores_today(self):
+        url = "/api/users/calendar/?from=2024-01-01&to=2024-01-31"
+        etag = self.client.get(url)["ETag"]
+
+        with mock.patch("users.versioning.date") as fake_date:
+            fake_date.today.return_value = date.today().replace(day=1) + timedelta(days=32)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class ListingPaginationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="lyra", email="lyra@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        log_symptoms(self.user, [(date(2024, 1, 1) + timedelta(days=i), ["Cramps"]) for i in range(150)])
+
+    def test_default_page_is_bounded(self):
+        response = self.client.get("/api/users/symptom-logs/")
+
+        self.assertEqual(len(response.json()), 100)
+        self.assertEqual(response.json()[0]["date"], "2024-05-29")
+        self.assertIn("X-Next-Cursor", response)
+
+    def test_cursor_walks_every_page(self):
+        response = self.client.get("/api/users/symptom-logs/?limit=100")
+        first_page = response.json()
+        response = self.client.get(f"/api/users/symptom-logs/?cursor={response['X-Next-Cursor']}")
+
+        dates = [log["date"] for log in first_page + response.json()]
+        self.assertEqual((len(first_page), len(dates)), (100, 150))
+        self.assertEqual(dates, sorted(set(dates), reverse=True))
+        self.assertNotIn("Link", response)
+
+
+@override_settings(CHAT_WRITE_BUFFER={"ENABLED": False})
+class ChatHistoryTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="orion", email="orion@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        chat_buffer._buffer = None
+        chat_buffer._known_chats.clear()
+
+    def test_title_is_the_first_message_beyond_the_page(self):
+        chat_buffer.save_message(self.user, "long-chat", "user", "How long is a typical cycle?")
+        for i in range(60):
+            chat_buffer.save_message(self.user, "long-chat", "bot" if i % 2 else "user", f"message {i}")
+
+        [chat] = self.client.get("/api/users/get-chat-history/?messages=50").json()["chats"]
+
+        self.assertEqual(chat["title"], "How long is a typical cycle?")
+        self.assertEqual(len(chat["messages"]), 50)
+        self.assertEqual(chat["messages"][-1]["text"], "message 59")
+        self.assertTrue(chat["has_more_messages"])
+
+    def test_exactly_a_page_of_messages_has_no_more(self):
+        for i in range(50):
+            chat_buffer.save_message(self.user, "short-chat", "user", f"message {i}")
+
+        [chat] = self.client.get("/api/users/get-chat-history/?messages=50").json()["chats"]
+
+        self.assertEqual(len(chat["messages"]), 50)
+        self.assertFalse(chat["has_more_messages"])
+
+
+@skipUnless(connection.vendor == "postgresql", "Full-text search runs on PostgreSQL only")
+class ArticleSearchTests(TestCase):
+    def setUp(self):
+        self.article = Article.objects.create(
+            title="Managing cramps", source="Test", url="https://example.com/cramps", published_date=timezone.now(),
+            content="Heat <b>helps</b> with menstrual cramps & endometriosis pain.",
+        )
+
+    def search(self, text):
+        return list(search_articles(Article.objects.all(), text))
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual(self.search("endometr"), [self.article])
+        self.assertEqual(self.search("heat menst"), [self.article])
+        self.assertEqual(self.search("menstrual -endometriosis"), [])  # Exclusions stay whole words
+
+    def test_headline_escapes_article_html(self):
+        [article] = self.search("cramps")
+        self.assertIn("&lt;b&gt;helps&lt;/b&gt;", article.headline)
+        self.assertIn("<mark>cramps</mark> &amp;", article.headline)
+
+
+@override_settings(CHAT_WRITE_BUFFER={"ENABLED": False})
+class MessageBufferTests(TransactionTestCase):  # Foreign keys are only checked when the flush commits
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="sol", email="sol@example.com", password="pw")
+        chat_buffer._buffer = None
+        chat_buffer._known_chats.clear()
+        self.chat_id = chat_buffer.resolve_chat_id(self.user, "buffered")
+        self.spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spill_dir)
+        self.buffer = chat_buffer.MessageBuffer(spill_dir=self.spill_dir)
+        # The flusher runs outside any request; inside a test it must keep the test's connection
+        patcher = mock.patch.object(chat_buffer, "close_old_connections", lambda: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add(self, text, chat_id=None):
+        return self.buffer.add(chat_id or self.chat_id, "user", text, user_id=self.user.id, session_id="buffered")
+
+    def test_rejected_message_is_dead_lettered_and_the_rest_written(self):
+        bulk_create = Message.objects.bulk_create
+
+        def reject_nul(rows, **kwargs):
+            if any("\x00" in row.text for row in rows):
+                raise ValueError("A string literal cannot contain NUL (0x00) characters.")
+            return bulk_create(rows, **kwargs)
+
+        for text in ("before", "bad\x00text", "after"):
+            self.add(text)
+        with mock.patch.object(Message.objects, "bulk_create", side_effect=reject_nul):
+            self.buffer.flush()
+
+        self.assertEqual(list(Message.objects.order_by("id").values_list("text", flat=True)), ["before", "after"])
+        self.assertEqual(self.buffer.pending_for([self.chat_id]), {})
+        [dead_letter] = Path(self.spill_dir).glob("dead-letter-*.jsonl")
+        self.assertEqual(json.loads(dead_letter.read_text())["text"], "bad\x00text")
+
+    def test_unreachable_database_keeps_messages_for_the_next_flush(self):
+        self.add("hello")
+        with mock.patch.object(Message.objects, "bulk_create", side_effect=OperationalError("server closed")):
+            with self.assertRaises(chat_buffer.DatabaseUnavailable):
+                self.buffer.flush()
+        self.assertEqual(len(self.buffer.pending_for([self.chat_id])[self.chat_id]), 1)
+
+        self.buffer.flush()
+        self.assertEqual(list(Message.objects.values_list("text", flat=True)), ["hello"])
+
+    def test_messages_of_a_deleted_chat_are_dropped(self):
+        self.add("still here")
+        ChatSession.objects.filter(id=self.chat_id).delete()  # Deleted by another process
+
+        self.buffer.flush()
+
+        self.assertFalse(ChatSession.objects.filter(user=self.user).exists())
+        self.assertFalse(Message.objects.exists())
+        self.assertIsNone(chat_buffer._cached_chat_id(self.user.id, "buffered"))
+
+    def test_nul_characters_are_stripped_before_saving(self):
+        chat_buffer.save_message(self.user, "buffered", "user", "hi\x00 there")
+        self.assertEqual(Message.objects.get().text, "hi there")
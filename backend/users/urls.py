@@ -1,8 +1,10 @@
 from django.urls import path
 from .views import RegisterUserView, LoginView, get_csrf_token, LogoutView
 from .views import MenstrualDataView, PredictNextCycleView, SymptomLogView, SymptomLogListCreateView, UpdateBotNameView, SymptomReportView, ContactSubmissionView
-from users.views import chatbot_response, get_chat_history, start_new_chat, delete_chat, ArticleListView, CategoryListView, AuthStatusView
+from users.chat_views import chatbot_response, chatbot_response_async, chatbot_stream, chat_cache_stats, chat_breakers, get_chat_history, start_new_chat, delete_chat
+from users.views import ArticleListView, CategoryListView, AuthStatusView
 from .views import UploadAvatarView, UpdateProfileView, ChangePasswordView, DeleteAccountView, DeleteMenstrualDataView,UserDetailView
+from .views import MenstrualDataImportView, CalendarView, SymptomLogBatchView, SymptomAnalyticsView, SymptomTrendsView
 
 urlpatterns = [
     path('register/', RegisterUserView.as_view(), name='register'),
@@ -11,9 +13,15 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
     path('menstrual-data/', MenstrualDataView.as_view(), name='menstrual-data'),
     path('predict-cycle/', PredictNextCycleView.as_view(), name='predict-cycle'),
+    path('calendar/', CalendarView.as_view(), name='calendar'),
     path('symptoms/', SymptomLogView.as_view(), name='symptom-log'),
     path('symptom-logs/', SymptomLogView.as_view(), name='symptom-log'),
+    path('symptoms/batch/', SymptomLogBatchView.as_view(), name='symptom-log-batch'),
     path('chatbot-response/', chatbot_response, name='chatbot-response'),
+    path('chatbot-response-async/', chatbot_response_async, name='chatbot-response-async'),
+    path('chatbot-stream/', chatbot_stream, name='chatbot-stream'),
+    path('chat-cache-stats/', chat_cache_stats, name='chat-cache-stats'),
+    path('chat-breakers/', chat_breakers, name='chat-breakers'),
     path('get-chat-history/', get_chat_history, name='get-chat-history'),
     path('start-new-chat/', start_new_chat, name='start-new-chat'),
     path('delete-chat/<str:session_id>/', delete_chat, name='delete-chat'),
@@ -22,11 +30,14 @@ urlpatterns = [
     path('users/auth-status/', AuthStatusView.as_view(), name='auth-status'),
     path('update-bot-name/', UpdateBotNameView.as_view(), name='update-bot-name'),
     path('symptom-report/', SymptomReportView.as_view(), name='symptom-report'),
+    path('symptom-analytics/', SymptomAnalyticsView.as_view(), name='symptom-analytics'),
+    path('symptom-trends/', SymptomTrendsView.as_view(), name='symptom-trends'),
     path('contact/', ContactSubmissionView.as_view(), name='contact-submission'),
     path('upload-avatar/', UploadAvatarView.as_view(), name='upload-avatar'),
     path('update-profile/', UpdateProfileView.as_view(), name='update-profile'),
     path('change-password/', ChangePasswordView.as_view(), name='change-password'),
     path('delete-account/', DeleteAccountView.as_view(), name='delete-account'),
     path('menstrual-data/<int:id>/', DeleteMenstrualDataView.as_view(), name='delete-menstrual-data'),
+    path('menstrual-data/import/', MenstrualDataImportView.as_view(), name='import-menstrual-data'),
     path('me/', UserDetailView.as_view(), name='user-detail'),
 ]
@@ -0,0 +1,57 @@
+"""
+Per-user version stamps for conditional GETs on the tracker endpoints.
+
+Each user's CycleStats row carries a counter for their periods and one for
+their symptom logs. Every write bumps the matching counter, and the read views
+turn it into a strong ETag with Django's `condition` decorator. A client that
+already holds the current data gets a 304 after one primary-key read; the rows
+are never queried or serialized.
+"""
+from datetime import date
+
+from django.db.models import F
+
+from .cycles import rebuild_cycle_stats
+from .models import CycleStats
+
+
+def data_versions(user):
+    """Returns (periods_version, symptoms_version) for the user."""
+    versions = CycleStats.objects.filter(pk=user.pk).values_list("periods_version", "symptoms_version").first()
+    if versions is None:
+        stats = rebuild_cycle_stats(user)
+        versions = (stats.periods_version, stats.symptoms_version)
+    return versions
+
+
+def bump_symptoms_version(user):
+    """Marks the user's symptom logs as changed. Periods are bumped by users.cycles on every write."""
+    if not CycleStats.objects.filter(pk=user.pk).update(symptoms_version=F("symptoms_version") + 1):
+        rebuild_cycle_stats(user)
+
+
+def periods_etag(request, *args, **kwargs):
+    return f"periods-{request.user.pk}-{data_versions(request.user)[0]}"
+
+
+def prediction_etag(request, *args, **kwargs):
+    # cycle_progress moves with the calendar, so the prediction also changes daily
+    return f"prediction-{request.user.pk}-{data_versions(request.user)[0]}-{date.today().isoformat()}"
+
+
+def symptoms_etag(request, *args, **kwargs):
+    return f"symptoms-{request.user.pk}-{data_versions(request.user)[1]}"
+
+
+def calendar_etag(request, *args, **kwargs):
+    # An explicit window is part of the cached URL; without ?from= the calendar shows
+    # the current month, so the tag has to change when the month does
+    periods_version, symptoms_version = data_versions(request.user)
+    window = "" if request.GET.get("from") else f"-{date.today():%Y-%m}"
+    return f"calendar-{request.user.pk}-{periods_version}-{symptoms_version}{window}"
+
+
+def trends_etag(request, *args, **kwargs):
+    # Cycle buckets depend on the periods as well as the symptom logs
+    periods_version, symptoms_version = data_versions(request.user)
+    return f"trends-{request.user.pk}-{periods_version}-{symptoms_version}"
@@ -25,11 +25,7 @@ from django.utils.timezone import now
 from rest_framework import serializers
 import os
 import json
-from google.cloud import dialogflow_v2 as dialogflow
 from django.conf import settings
-from google.auth import default
-from google.oauth2 import service_account
-import openai
 import uuid
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
@@ -41,6 +37,17 @@ from .serializers import ArticleSerializer, CategorySerializer, ContactSubmissio
 from django.db.models import Q
 from django.contrib.auth.hashers import check_password, make_password
 from django.core.files.storage import default_storage
+from .article_search import search_articles
+from .cycles import delete_period, log_period, predict_next_cycle, predicted_cycles
+from .period_import import PeriodImportError, clean_periods, import_periods, parse_periods
+from .pagination import paginate_by_date, parse_limit, set_next_page_headers
+from .symptom_analytics import get_population_analytics, get_symptom_analytics
+from .symptom_report import build_symptom_report
+from .symptom_trends import GRANULARITIES, TREND_SETTINGS, symptom_trends
+from .symptom_logging import MAX_BATCH_DAYS, log_symptoms
+from .symptoms import filter_by_symptom, sync_log_symptoms
+from .versioning import bump_symptoms_version, calendar_etag, periods_etag, prediction_etag, symptoms_etag, trends_etag
+from django.views.decorators.http import condition
 
 logger = logging.getLogger(__name__)
 
@@ -161,14 +168,22 @@ class LogoutView(APIView):
 class MenstrualDataView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=periods_etag))
     def get(self, request):
         """
-        Retrieves user's logged period data.
+        Retrieves user's logged period data, oldest first, one page at a time.
+        Optional query params: from/to (YYYY-MM-DD), limit, and cursor from the
+        X-Next-Cursor / Link header of the previous page.
         """
         user = request.user
-        data = MenstrualData.objects.filter(user=user).order_by('start_date')
+        try:
+            data, next_cursor = paginate_by_date(
+                MenstrualData.objects.filter(user=user), request.query_params, "start_date"
+            )
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         serializer = MenstrualDataSerializer(data, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return set_next_page_headers(Response(serializer.data, status=status.HTTP_200_OK), request, next_cursor)
 
     def post(self, request):
         """
@@ -200,27 +215,12 @@ class MenstrualDataView(APIView):
         except ValueError:
             return Response({"message": "Period length must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # ✅ Get previous recorded period
-        previous_period = MenstrualData.objects.filter(user=user).order_by('-start_date').first()
-
-        # ✅ Calculate cycle length dynamically
-        cycle_length = 28  # Default if no previous data
-        if previous_period:
-            cycle_length = (start_date - previous_period.start_date).days
-            if cycle_length <= 0:  # Handle invalid cycle lengths
-                cycle_length = 28
-
         try:
-            MenstrualData.objects.create(
-                user=user,
-                start_date=start_date,
-                end_date=end_date,
-                period_length=period_length,
-                cycle_length=cycle_length
-            )
+            # ✅ Cycle length counts from the previous period; a later period logged before this one is re-linked
+            period = log_period(user, start_date, end_date, period_length)
             return Response({
                 "message": "Period data saved successfully",
-                "cycle_length": cycle_length  # Send calculated cycle length to frontend
+                "cycle_length": period.cycle_length  # Send calculated cycle length to frontend
             }, status=status.HTTP_201_CREATED)
         except Exception as e:
             logger.error(f"Error saving period data: {str(e)}")
@@ -233,11 +233,11 @@ class PredictNextCycleView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=prediction_etag))
     def get(self, request):
-        user = request.user
-        data = MenstrualData.objects.filter(user=user).order_by('-start_date')
+        prediction = predict_next_cycle(request.user)
 
-        if not data.exists():
+        if prediction is None:
             return Response({
                 "message": "No data available for predictions",
                 "next_period_start": None,
@@ -248,45 +248,7 @@ class PredictNextCycleView(APIView):
                 "suggestion": "Log your first period to start tracking predictions."
             }, status=200)
 
-        # Dynamically calculate cycle lengths from past periods
-        cycle_lengths = []
-        period_lengths = []
-        previous_entry = None
-
-        for entry in data:
-            if previous_entry:
-                cycle_length = (previous_entry.start_date - entry.start_date).days
-                cycle_lengths.append(cycle_length)
-            period_lengths.append(entry.period_length)
-            previous_entry = entry
-
-        # Use average cycle length if multiple periods exist
-        if cycle_lengths:
-            avg_cycle_length = round(sum(cycle_lengths) / len(cycle_lengths))
-        else:
-            avg_cycle_length = 28  # Default if only one record exists
-
-        avg_period_length = round(sum(period_lengths) / len(period_lengths))
-
-        # Predict from last cycle's end date
-        last_cycle = data.first()
-        next_start_date = last_cycle.end_date + timedelta(days=avg_cycle_length)
-        next_end_date = next_start_date + timedelta(days=avg_period_length)
-        fertile_window_start = next_start_date - timedelta(days=14)
-        fertile_window_end = fertile_window_start + timedelta(days=5)
-
-        # Calculate cycle progress
-        today = datetime.now().date()
-        days_since_last_period = (today - last_cycle.end_date).days
-        cycle_progress = (days_since_last_period / avg_cycle_length) * 100
-
-        return Response({
-            "next_period_start": next_start_date,
-            "next_period_end": next_end_date,
-            "fertile_window_start": fertile_window_start,
-            "fertile_window_end": fertile_window_end,
-            "cycle_progress": min(cycle_progress, 100),
-        }, status=200)
+        return Response(prediction, status=200)
 
 
 
@@ -298,89 +260,121 @@ logger = logging.getLogger(__name__)
 class SymptomLogView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=symptoms_etag))
     def get(self, request):
-        """Retrieve user's logged symptoms"""
+        """Retrieve user's logged symptoms, newest first, paginated like MenstrualDataView.get. ?symptom= filters by name."""
         user = request.user
-        logs = SymptomLog.objects.filter(user=user).order_by('-date')
+        logs = SymptomLog.objects.filter(user=user)
+        if request.query_params.get("symptom"):
+            logs = filter_by_symptom(logs, user, request.query_params["symptom"])
+        try:
+            logs, next_cursor = paginate_by_date(logs, request.query_params, "date", descending=True)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         serializer = SymptomLogSerializer(logs, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return set_next_page_headers(Response(serializer.data, status=status.HTTP_200_OK), request, next_cursor)
 
     def post(self, request):
         """Log symptoms for a specific date, combining with existing entry if duplicate."""
-        user = request.user
-        data = request.data
-
-     # Extract and validate data
-        date = data.get("date")
-        symptoms = data.get("symptoms", [])
-        if not date or not isinstance(symptoms, list) or len(symptoms) == 0:
-            return Response({"message": "Date and symptoms are required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            date, symptoms = parse_symptom_entry(request.data)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-        # Parse the date
-            date = datetime.strptime(date, "%Y-%m-%d").date()
-            logger.info(f"Parsed date from request: {date}")
-        except ValueError:
-            return Response({"message": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+            [(symptom_log, created)] = log_symptoms(request.user, [(date, symptoms)])
+        except Exception as e:
+            logger.error(f"Error logging symptoms: {str(e)}")
+            return Response({"message": "Internal Server Error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    # Query for the last period that occurred before or on the symptom log date
-        last_period = MenstrualData.objects.filter(
-             user=user,
-            start_date__lte=date
-        ).order_by('-start_date').first()
-        logger.info(f"Query filter: user={user.id}, start_date__lte={date}, raw query: {MenstrualData.objects.filter(user=user, start_date__lte=date).query}")
-
-    # Calculate cycle_day if a period is found
-        cycle_day = None
-        if last_period:
-            cycle_day = (date - last_period.start_date).days + 1
-            logger.info(f"Calculated cycle_day: {cycle_day} based on last_period.start_date: {last_period.start_date}")
-            if cycle_day < 1:
-                logger.warning(f"Invalid cycle_day ({cycle_day}) calculated, setting to None")
-                cycle_day = None
-        else:
+        if symptom_log.cycle_day is None:
             logger.warning("No last period found for the user")
+        if created:
+            logger.info(f"Symptom log saved with cycle_day: {symptom_log.cycle_day}")
+            return Response({
+                "message": "Symptoms logged successfully",
+                "cycle_day": symptom_log.cycle_day
+            }, status=status.HTTP_201_CREATED)
+        logger.info(f"Updated existing symptom log for {date} with cycle_day: {symptom_log.cycle_day}, combined symptoms: {symptom_log.symptoms}")
+        return Response({
+            "message": "Symptoms updated successfully for existing date",
+            "cycle_day": symptom_log.cycle_day,
+            "combined_symptoms": symptom_log.symptoms
+        }, status=status.HTTP_200_OK)
 
-    # Check for existing symptom log for the same user and date
-        existing_log = SymptomLog.objects.filter(user=user, date=date).first()
+
+def parse_symptom_entry(data):
+    """Validates one {"date": "YYYY-MM-DD", "symptoms": [...]} entry. Raises ValueError with a client-facing message."""
+    date = data.get("date") if isinstance(data, dict) else None
+    symptoms = data.get("symptoms", []) if isinstance(data, dict) else None
+    if not date or not isinstance(symptoms, list) or len(symptoms) == 0:
+        raise ValueError("Date and symptoms are required.")
+    try:
+        date = datetime.strptime(str(date), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("Invalid date format. Use YYYY-MM-DD.")
+    return date, symptoms
+
+
+class SymptomLogBatchView(APIView):
+    """
+    Logs symptoms for many days in one request: {"entries": [{"date": ..., "symptoms": [...]}, ...]}.
+    Each day is merged into its existing log like SymptomLogView.post, and all days are saved together.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        entries = request.data.get("entries") if isinstance(request.data, dict) else None
+        if not isinstance(entries, list) or not entries:
+            return Response({"message": "entries must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > MAX_BATCH_DAYS:
+            return Response(
+                {"message": f"At most {MAX_BATCH_DAYS} entries can be logged at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        parsed = []
+        for i, entry in enumerate(entries):
+            try:
+                parsed.append(parse_symptom_entry(entry))
+            except ValueError as e:
+                return Response({"message": f"Entry {i}: {e}"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            if existing_log:
-            # Combine symptoms (remove duplicates by converting to set)
-                existing_symptoms = existing_log.symptoms
-                combined_symptoms = list(set(existing_symptoms + symptoms))
-                existing_log.symptoms = combined_symptoms
-                existing_log.cycle_day = cycle_day  # Update cycle_day in case it changed
-                existing_log.save()
-                logger.info(f"Updated existing symptom log for {date} with cycle_day: {cycle_day}, combined symptoms: {combined_symptoms}")
-                return Response({
-                    "message": "Symptoms updated successfully for existing date",
-                    "cycle_day": cycle_day,
-                    "combined_symptoms": combined_symptoms
-                }, status=status.HTTP_200_OK)
-            else:
-            # Create a new symptom log
-                symptom_log = SymptomLog.objects.create(
-                    user=user,
-                    date=date,
-                    cycle_day=cycle_day,
-                    symptoms=symptoms
-                )
-                logger.info(f"Symptom log saved with cycle_day: {symptom_log.cycle_day}")
-                return Response({
-                    "message": "Symptoms logged successfully",
-                    "cycle_day": cycle_day
-                }, status=status.HTTP_201_CREATED)
+            results = log_symptoms(request.user, parsed)
         except Exception as e:
-            logger.error(f"Error logging symptoms: {str(e)}")
+            logger.error(f"Error batch logging symptoms: {str(e)}")
             return Response({"message": "Internal Server Error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        created = sum(1 for _, was_created in results if was_created)
+        logger.info(f"Batch logged symptoms for {len(results)} days ({created} new) for user {request.user.id}")
+        return Response({
+            "message": "Symptoms logged successfully",
+            "created": created,
+            "updated": len(results) - created,
+            "logs": [
+                {"date": log.date, "cycle_day": log.cycle_day, "symptoms": log.symptoms}
+                for log, _ in results
+            ],
+        }, status=status.HTTP_200_OK)
         
 class SymptomLogListCreateView(generics.ListCreateAPIView):
     serializer_class = SymptomLogSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return SymptomLog.objects.filter(user=self.request.user)
+        logs = SymptomLog.objects.filter(user=self.request.user)
+        if self.request.query_params.get("symptom"):
+            logs = filter_by_symptom(logs, self.request.user, self.request.query_params["symptom"])
+        return logs
+
+    def list(self, request, *args, **kwargs):
+        try:
+            logs, next_cursor = paginate_by_date(self.get_queryset(), request.query_params, "date", descending=True)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(logs, many=True)
+        return set_next_page_headers(Response(serializer.data), request, next_cursor)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -388,186 +382,13 @@ class SymptomLogListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         try:
             print("Incoming data:", serializer.validated_data)
-            serializer.save(user=self.request.user)
+            symptom_log = serializer.save(user=self.request.user)
+            sync_log_symptoms([symptom_log])
+            bump_symptoms_version(self.request.user)
         except serializers.ValidationError as e:
             print("Validation Error:", e.detail)
             raise
 
-# Path to your service account JSON key (Make sure this file exists)
-SERVICE_ACCOUNT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config/dialogflow-key.json")
-
-# Force Django to use explicit credentials
-credentials = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_PATH)
-
-# Dialogflow project ID
-DIALOGFLOW_PROJECT_ID = 'flourish-448006'  # Replace with your actual project ID
-
-USE_GPT_FALLBACK = True
-
-# Load OpenAI API Key
-OPENAI_API_KEY = settings.OPENAI_API_KEY
-
-# Check if OpenAI API key is loaded
-print(f"OpenAI API Key exists: {bool(OPENAI_API_KEY)}")
-print(f"OpenAI API Key first 5 chars: {OPENAI_API_KEY[:5] if OPENAI_API_KEY else 'None'}")
-print(f"USE_GPT_FALLBACK setting: {USE_GPT_FALLBACK}")
-
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def start_new_chat(request):
-    """Creates a new chat session and returns session_id."""
-    user = request.user  # Ensure user is logged in
-
-    try:
-        session_id = str(uuid.uuid4())  # Generate a unique session ID
-        chat_session = ChatSession.objects.create(user=user, session_id=session_id)
-
-        # ✅ Debugging: Check if the session is actually created
-        if chat_session:
-            print(f"✅ New chat session created: {chat_session.session_id} for user {user}")
-        else:
-            print("❌ Chat session creation failed.")
-
-        return JsonResponse({"session_id": session_id})  # ✅ Ensure session_id is returned
-
-    except Exception as e:
-        print(f"❌ Error creating chat session: {str(e)}")
-        return JsonResponse({"error": "Failed to create session"}, status=500)
-
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def get_chat_history(request):
-    """Fetches the last 10 chat sessions for the logged-in user."""
-    user = request.user
-    chats = ChatSession.objects.filter(user=user).order_by("-created_at")[:10]
-    
-    chat_data = []
-    for chat in chats:
-        messages = chat.messages.order_by("timestamp").values("sender", "text", "timestamp")
-        chat_data.append({"session_id": chat.session_id, "messages": list(messages)})
-
-    return JsonResponse({"chats": chat_data if chat_data else []}) 
-
-
-@api_view(['DELETE'])
-def delete_chat(request, session_id):
-    try:
-        chat = ChatSession.objects.get(session_id=session_id)
-        chat.delete()
-        return Response({"message": "Chat deleted successfully"}, status=status.HTTP_200_OK)
-    except ChatSession.DoesNotExist:
-        return Response({"error": "Chat not found"}, status=status.HTTP_404_NOT_FOUND)
-
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def chatbot_response(request):
-    """Handles chatbot response & stores messages in DB."""
-    user = request.user
-    data = json.loads(request.body)
-    user_message = data.get("message", "")
-    session_id = data.get("session_id")
-
-    print(f"📝 Received message: '{user_message}' for session {session_id}")
-
-    if not session_id:
-        return JsonResponse({"error": "No session ID provided"}, status=400)
-
-    # Ensure session exists
-    chat_session, _ = ChatSession.objects.get_or_create(user=user, session_id=session_id)
-
-    # Store user message
-    Message.objects.create(chat=chat_session, sender="user", text=user_message)
-
-    # Send message to Dialogflow
-    print("📡 Sending message to Dialogflow...")
-    session_client = dialogflow.SessionsClient(credentials=credentials)
-    session = session_client.session_path(DIALOGFLOW_PROJECT_ID, session_id)
-    text_input = dialogflow.TextInput(text=user_message, language_code="en")
-    query_input = dialogflow.QueryInput(text=text_input)
-    response = session_client.detect_intent(request={"session": session, "query_input": query_input})
-
-    bot_reply = response.query_result.fulfillment_text or "I didn't understand that."
-    intent_name = response.query_result.intent.display_name
-
-    print(f"🤖 Dialogflow replied: '{bot_reply}', Intent: '{intent_name}'")
-
-    # List of Dialogflow fallback responses
-    fallback_responses = [
-        "I don't understand", 
-        "", 
-        "What was that?",
-        "I didn't get that. Can you say it again?",
-        "I missed what you said.",
-        "What was that?",
-        "Sorry, what was that?",
-        "I missed that, say that again?"
-    ]
-
-    # Fallback to GPT-3.5 if Dialogflow returns a fallback response
-    is_fallback = bot_reply in fallback_responses or intent_name == "Default Fallback Intent"
-    print(f"🔄 Should use GPT fallback? {is_fallback}")
-
-    if USE_GPT_FALLBACK and is_fallback:
-        print("🔄 Triggering GPT fallback...")
-        bot_reply = get_gpt_response(user_message)
-        print(f"🔄 Final bot reply after fallback: '{bot_reply[:30]}...'")
-
-    # Store bot response
-    Message.objects.create(chat=chat_session, sender="bot", text=bot_reply)
-
-    return JsonResponse({"response": bot_reply})
-
-
-def get_gpt_response(user_message):
-    """Fallback to OpenAI GPT-3.5 if Dialogflow fails."""
-    print(f"⚠️ Entering get_gpt_response with message: {user_message[:30]}...")
-    
-    if not OPENAI_API_KEY:
-        print("❌ No OpenAI API key found")
-        return "I'm sorry, but I cannot respond at the moment. (Missing API key)"
-        
-    if not USE_GPT_FALLBACK:
-        print("❌ GPT fallback is disabled")
-        return "I'm sorry, but I cannot respond at the moment. (Fallback disabled)"
-
-    print("✅ API key exists and fallback is enabled. Attempting API call...")
-    
-    try:
-        # Try with newer OpenAI client
-        print("📡 Attempting to use new OpenAI client...")
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        completion = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful AI assistant."},
-                {"role": "user", "content": user_message}
-            ]
-        )
-        response_text = completion.choices[0].message.content
-        print(f"✅ OpenAI API call successful with new client. Response: {response_text[:30]}...")
-        return response_text
-    except AttributeError as e:
-        print(f"⚠️ AttributeError with new client: {str(e)}. Trying legacy approach...")
-        # Fall back to legacy approach
-        try:
-            print("📡 Attempting to use legacy OpenAI API...")
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI assistant."},
-                    {"role": "user", "content": user_message}
-                ]
-            )
-            response_text = response["choices"][0]["message"]["content"]
-            print(f"✅ OpenAI API call successful with legacy client. Response: {response_text[:30]}...")
-            return response_text
-        except Exception as e:
-            print(f"❌ Error with legacy OpenAI call: {str(e)}")
-            return f"I'm sorry, but I cannot respond at the moment. (API error: {str(e)[:50]}...)"
-    except Exception as e:
-        print(f"❌ Error with new OpenAI client: {str(e)}")
-        return f"I'm sorry, but I cannot respond at the moment. (Client error: {str(e)[:50]}...)"
-        
 class CategoryListView(generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -585,7 +406,7 @@ class ArticleListView(generics.ListAPIView):
         if category:
             queryset = queryset.filter(categories__name__iexact=category)
         if search:
-            queryset = queryset.filter(Q(title__icontains=search) | Q(content__icontains=search))
+            queryset = search_articles(queryset, search)
 
         return queryset
     
@@ -621,6 +442,89 @@ class UpdateBotNameView(APIView):
         return Response({"message": "Assistant name updated successfully"}, status=status.HTTP_200_OK)
     
 
+class CalendarView(APIView):
+    """
+    Everything the tracker calendar shows for a date window in one call:
+    logged periods and symptom logs overlapping ?from=YYYY-MM-DD&to=YYYY-MM-DD,
+    and the predicted periods and fertile windows that fall in it.
+    Defaults to the current month.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_WINDOW_DAYS = 93
+
+    @method_decorator(condition(etag_func=calendar_etag))
+    def get(self, request):
+        user = request.user
+        params = request.query_params
+        try:
+            if params.get("from"):
+                start_date = datetime.strptime(params["from"], "%Y-%m-%d").date()
+            else:
+                start_date = datetime.now().date().replace(day=1)
+            if params.get("to"):
+                end_date = datetime.strptime(params["to"], "%Y-%m-%d").date()
+            else:  # End of the month `from` falls in
+                end_date = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        except ValueError:
+            return Response({"message": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if end_date < start_date:
+            return Response({"message": "'to' cannot be before 'from'."}, status=status.HTTP_400_BAD_REQUEST)
+        if (end_date - start_date).days >= self.MAX_WINDOW_DAYS:
+            return Response(
+                {"message": f"The window can span at most {self.MAX_WINDOW_DAYS} days."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Both are range scans on the (user, start_date) and (user, date) indexes
+        periods = MenstrualData.objects.filter(
+            user=user, start_date__lte=end_date, end_date__gte=start_date
+        ).order_by('start_date')
+        symptoms = SymptomLog.objects.filter(user=user, date__range=(start_date, end_date)).order_by('date')
+
+        return Response({
+            "from": start_date,
+            "to": end_date,
+            "periods": MenstrualDataSerializer(periods, many=True).data,
+            "symptoms": SymptomLogSerializer(symptoms, many=True).data,
+            "predictions": predicted_cycles(user, start_date, end_date),
+        }, status=status.HTTP_200_OK)
+
+
+class MenstrualDataImportView(APIView):
+    """
+    Imports period history in bulk. Send JSON ({"periods": [...]} or a list) or
+    upload a CSV/JSON file as `file`. Each period has start_date, end_date and
+    optionally period_length. Periods already logged on the same start date are
+    updated, so re-importing a file is safe; a start date listed twice is rejected.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            upload = request.FILES.get("file")
+            if upload:
+                fmt = "csv" if upload.name.lower().endswith(".csv") or upload.content_type == "text/csv" else "json"
+                periods = parse_periods(upload.read().decode("utf-8-sig"), fmt)
+            else:
+                periods = clean_periods(request.data)
+        except UnicodeDecodeError:
+            return Response({"message": "File must be UTF-8 encoded."}, status=status.HTTP_400_BAD_REQUEST)
+        except PeriodImportError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not periods:
+            return Response({"message": "No periods to import."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = import_periods(request.user, periods)
+        except Exception as e:
+            logger.error(f"Error importing period data: {str(e)}")
+            return Response({"message": "Internal Server Error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({"message": "Period data imported successfully", **result}, status=status.HTTP_200_OK)
+
+
 class DeleteMenstrualDataView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -628,7 +532,7 @@ class DeleteMenstrualDataView(APIView):
         user = request.user
         try:
             menstrual_data = MenstrualData.objects.get(id=id, user=user)
-            menstrual_data.delete()
+            delete_period(menstrual_data)
             return Response({"message": "Period data deleted successfully"}, status=status.HTTP_200_OK)
         except MenstrualData.DoesNotExist:
             return Response({"message": "Period data not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -653,45 +557,79 @@ class SymptomReportView(APIView):
 
     def get(self, request):
         """Generate a report of symptoms by cycle day and their ranges."""
-        user = request.user
-        logs = SymptomLog.objects.filter(user=user, cycle_day__isnull=False).order_by('cycle_day')
+        report = build_symptom_report(request.user)
 
-        if not logs.exists():
+        if report is None:
             return Response({
                 "message": "No symptom logs with cycle day available.",
                 "symptoms_by_cycle_day": {},
                 "symptom_ranges": {}
             }, status=status.HTTP_200_OK)
 
-        # Step 1: Build symptoms_by_cycle_day
-        symptoms_by_cycle_day = {}
-        for log in logs:
-            cycle_day = str(log.cycle_day)  # Convert to string for JSON serialization
-            if cycle_day not in symptoms_by_cycle_day:
-                symptoms_by_cycle_day[cycle_day] = list(set(log.symptoms))  # Initialize with unique symptoms
-            else:
-                # Add new symptoms, ensuring uniqueness
-                symptoms_by_cycle_day[cycle_day] = list(set(symptoms_by_cycle_day[cycle_day] + log.symptoms))
-
-        # Step 2: Build symptom_ranges
-        symptom_cycle_days = {}
-        for log in logs:
-            for symptom in log.symptoms:
-                if symptom not in symptom_cycle_days:
-                    symptom_cycle_days[symptom] = []
-                symptom_cycle_days[symptom].append(log.cycle_day)
-
-        symptom_ranges = {}
-        for symptom, cycle_days in symptom_cycle_days.items():
-            symptom_ranges[symptom] = {
-                "min_cycle_day": min(cycle_days),
-                "max_cycle_day": max(cycle_days)
-            }
-
+        symptoms_by_cycle_day, symptom_ranges = report
         return Response({
             "symptoms_by_cycle_day": symptoms_by_cycle_day,
             "symptom_ranges": symptom_ranges
         }, status=status.HTTP_200_OK)
+
+
+class SymptomTrendsView(APIView):
+    """
+    Symptom counts over time: ?granularity=week|month|cycle (default month),
+    optional ?from=/&to= (YYYY-MM-DD), ?symptom= (repeatable) and ?max_points=.
+    Long histories are merged into at most max_points points.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @method_decorator(condition(etag_func=trends_etag))
+    def get(self, request):
+        params = request.query_params
+        granularity = params.get("granularity", "month")
+        if granularity not in GRANULARITIES:
+            return Response(
+                {"message": f"granularity must be one of: {', '.join(GRANULARITIES)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start_date = datetime.strptime(params["from"], "%Y-%m-%d").date() if params.get("from") else None
+            end_date = datetime.strptime(params["to"], "%Y-%m-%d").date() if params.get("to") else None
+        except ValueError:
+            return Response({"message": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        max_points = parse_limit(params.get("max_points"), TREND_SETTINGS["MAX_POINTS"], TREND_SETTINGS["MAX_POINTS"])
+
+        trends = symptom_trends(
+            request.user, granularity, max_points, start_date, end_date, params.getlist("symptom") or None
+        )
+        return Response(trends, status=status.HTTP_200_OK)
+
+
+class SymptomAnalyticsView(APIView):
+    """
+    Symptom-by-cycle-day heatmap, co-occurrence matrix and lift scores for the
+    user's logs, or across all users with ?scope=population (staff only: a
+    cache miss recomputes it over every user's logs). Matrix rows and columns
+    follow the order of "symptoms".
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        scope = request.query_params.get("scope", "user")
+        if scope not in ("user", "population"):
+            return Response({"message": "scope must be 'user' or 'population'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if scope == "population":
+            if not request.user.is_staff:
+                return Response(
+                    {"message": "Population analytics are only available to staff."},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
+            analytics = get_population_analytics()
+        else:
+            analytics = get_symptom_analytics(request.user)
+
+        if analytics is None:
+            return Response({"message": "No symptom logs available.", "scope": scope}, status=status.HTTP_200_OK)
+        return Response({"scope": scope, **analytics}, status=status.HTTP_200_OK)
     
 
 from rest_framework.views import APIView
@@ -57,7 +57,7 @@ const Chatbot = ({ isFullPage }) => {
       const response = await axiosInstance.get("/users/get-chat-history/");
       const chatsWithTitles = response.data.chats.map((chat) => ({
         ...chat,
-        title: chat.messages.length > 0 ? chat.messages[0].text : `Chat ${chat.session_id.slice(-4)}`
+        title: chat.title || `Chat ${chat.session_id.slice(-4)}`
       }));
       setChatHistory(chatsWithTitles);
     } catch (error) {
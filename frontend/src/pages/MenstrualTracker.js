@@ -63,11 +63,22 @@ function MenstrualTracker() {
         };
     }, []);
 
+    //fetch every page of a listing, following the X-Next-Cursor header
+    const fetchAllPages = async (url) => {
+        let rows = [];
+        let cursor = null;
+        do {
+            const response = await axiosInstance.get(url, { params: cursor ? { cursor } : {} });
+            rows = rows.concat(response.data);
+            cursor = response.headers["x-next-cursor"];
+        } while (cursor);
+        return rows;
+    };
+
     //fetch data
     const fetchData = async () => {
         try {
-            const response = await axiosInstance.get("/users/menstrual-data/");
-            setMenstrualData(response.data);
+            setMenstrualData(await fetchAllPages("/users/menstrual-data/"));
         } catch (error) {
             console.error("Error fetching menstrual data:", error);
         }
@@ -76,8 +87,7 @@ function MenstrualTracker() {
     //fetch symptoms
     const fetchSymptoms = async () => {
         try {
-            const response = await axiosInstance.get("/users/symptom-logs/");
-            setSymptomLogs(response.data);
+            setSymptomLogs(await fetchAllPages("/users/symptom-logs/"));
         } catch (error) {
             console.error("Error fetching symptom logs:", error);
         }